@@ -36,8 +36,14 @@ from .qr_code_file_transfer import (
     decode_qr_array_to_file
 )
 
-# 尝试导入GUI功能，如果PyQt6不可用则忽略
-try:
-    from .qr_array_gui import QRArrayApp, main as gui_main
-except ImportError:
-    pass 
\ No newline at end of file
+# GUI功能按需导入，仅使用命令行/库功能时不必加载PyQt6
+def __getattr__(name):
+    if name in ('QRArrayApp', 'gui_main'):
+        # PyQt6不可用时抛出AttributeError，与未导出的名称一致
+        try:
+            from .qr_array_gui import QRArrayApp, main as gui_main
+        except ImportError as e:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r} (PyQt6不可用: {e})")
+        globals().update(QRArrayApp=QRArrayApp, gui_main=gui_main)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
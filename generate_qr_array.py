@@ -2,66 +2,209 @@ import qrcode
 import numpy as np
 from PIL import Image
 import os
+import io
 import math
+import hashlib
 import shutil
+import tempfile
+import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import chain, islice
+
+# 可选的segno编码后端，安装后优先使用（掩码评估等实现更高效，编码速度约为qrcode的2倍）
+try:
+    import segno
+except ImportError:
+    segno = None
 
 # QR码最大版本常量
 MAX_VERSION = 40
+# 每个QR码模块的像素大小
+QR_BOX_SIZE = 10
+# QR码静区宽度（模块数），加宽以确保足够的静区
+QR_BORDER = 6
 # QR码之间的间距（像素）
 QR_CODE_SPACING = 20
 # 添加额外边距（像素）
 QR_CODE_MARGIN = 40
-# 默认临时文件夹
-DEFAULT_TEMP_DIR = "qrcodes"
+# 自动布局时的目标宽高比（宽/高），0.707接近A4纵向纸张，便于打印
+ARRAY_TARGET_ASPECT = 0.707
+# 输出PNG的写缓冲区大小（字节）
+PNG_WRITE_BUFFER_SIZE = 1024 * 1024
+# 流式读取输入时的读缓冲区大小（字节）
+STREAM_READ_BUFFER_SIZE = 1024 * 1024
+# 输出PNG的zlib压缩级别：1编码速度约为默认级别6的3倍，文件仅略大
+PNG_COMPRESS_LEVEL = 1
+# QR码阵列缓存的建议目录（缓存需显式启用），相同输入再次生成时直接复制缓存结果。
+# 缓存图像包含所编码的内容，默认不启用
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "multi_qrcode")
+# 缓存目录的总大小上限（字节），超出时按修改时间删除最久未使用的缓存
+ARRAY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# 写入中断残留的临时文件超过该时间（秒）后在清理缓存时删除
+ARRAY_CACHE_TEMP_MAX_AGE = 3600
+# 缓存格式版本，阵列输出格式或布局算法变化时递增，使旧缓存失效
+ARRAY_CACHE_FORMAT = 3
+# 块数少于该值时直接在当前进程中生成QR码，启动子进程的开销超过并行带来的收益
+PARALLEL_MIN_CHUNKS = 16
+# 并行生成时每个工作进程最多预先提交的块数
+PARALLEL_WINDOW_FACTOR = 4
+
+# 复用的QR码生成进程池，首次需要并行生成时按CPU数创建，之后不再替换（其他线程可能正在使用）；
+# 进程池无法启动时（如调用脚本缺少 if __name__ == '__main__' 保护）不再尝试并行生成
+_process_pool = None
+_process_pool_disabled = False
+# 当前进程池是否已成功完成过任务
+_process_pool_ready = False
+_process_pool_lock = threading.Lock()
 
 def split_text(text, chunk_size=100):
     """将文本分割成固定大小的块"""
     return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
 
-def generate_qr_code(text, index, output_dir=DEFAULT_TEMP_DIR):
-    """生成单个QR码并保存"""
+def split_bytes(data, chunk_size=100):
+    """将字节数据分割成固定大小的块，返回memoryview切片（零拷贝）"""
+    mv = memoryview(data)
+    return [mv[i:i+chunk_size] for i in range(0, len(mv), chunk_size)]
+
+def _encode_with_segno(payload, version=None):
+    """使用segno编码，返回 (模块矩阵, 版本号)"""
+    # 文本固定按UTF-8字节模式编码，不使用Kanji模式，与qrcode后端的读取方式一致；
+    # 不提升纠错级别
+    options = dict(error='L', mode='byte', boost_error=False)
+    if not isinstance(payload, bytes):
+        options['encoding'] = 'utf-8'
+    
+    if version is not None:
+        try:
+            # 同一批次的块大小相同，通常收敛到同一版本，直接使用已知版本
+            qr = segno.make_qr(payload, version=version, **options)
+            return np.array(qr.matrix, dtype=bool), qr.version
+        except segno.DataOverflowError:
+            # 当前块内容更复杂（如更多多字节字符），回退为自动选择
+            pass
+    
+    try:
+        qr = segno.make_qr(payload, **options)
+    except segno.DataOverflowError:
+        raise qrcode.exceptions.DataOverflowError()
+    return np.array(qr.matrix, dtype=bool), qr.version
+
+def _encode_with_qrcode(payload, version=None):
+    """使用qrcode库编码，返回 (模块矩阵, 版本号)
+
+    version为None时自动选择最小可用版本；指定version时直接使用该版本（fit=False），
+    跳过版本探测循环，若数据放不下则回退为自动适应。
+    """
     qr = qrcode.QRCode(
-        version=1,  # 初始版本为1，自动适应
+        version=version or 1,  # 未指定时初始版本为1，自动适应
         error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=6,  # 增加边界宽度，确保足够的静区
+        border=0,  # 静区在渲染时统一添加
     )
     
+    if isinstance(payload, bytes):
+        # 字节数据（如Base64）直接按8位字节模式编码，跳过qrcode的分段优化扫描
+        qr.add_data(payload, optimize=0)
+    else:
+        qr.add_data(payload)
+    
+    if version is not None:
+        try:
+            # 同一批次的块大小相同，通常收敛到同一版本，直接使用已知版本
+            qr.make(fit=False)
+            return np.array(qr.modules, dtype=bool), qr.version
+        except qrcode.exceptions.DataOverflowError:
+            # 当前块内容更复杂（如更多多字节字符），回退为自动适应
+            pass
+    
+    # 尝试使用自动适应版本，但限制最大版本
+    qr.make(fit=True)
+    
+    # 检查版本是否超出范围
+    if qr.version > MAX_VERSION:
+        raise ValueError(f"QR码版本 ({qr.version}) 超出了最大支持版本 ({MAX_VERSION})。数据过大或复杂，请减小文本块大小。")
+    
+    return np.array(qr.modules, dtype=bool), qr.version
+
+def _build_qr_code(text, index, version=None):
+    """构建并计算单个QR码，返回 (模块矩阵, 版本号)
+
+    模块矩阵为bool类型的ndarray，True为黑色模块。安装了segno时优先使用它编码，
+    否则使用qrcode库。
+    """
     # 添加索引前缀以确保正确的读取顺序
     # 使用明确的格式 "IDX:nnn:" 其中nnn是固定3位数的索引号，便于解析
     index_str = f"IDX:{index:03d}:"
-    text_with_index = f"{index_str}{text}"
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        payload = index_str.encode('ascii') + bytes(text)
+    else:
+        payload = f"{index_str}{text}"
     
-    # 添加数据并限制版本
-    qr.add_data(text_with_index)
+    encode = _encode_with_segno if segno is not None else _encode_with_qrcode
     try:
-        # 尝试使用自动适应版本，但限制最大版本
-        qr.make(fit=True)
-        
-        # 检查版本是否超出范围
-        if qr.version > MAX_VERSION:
-            raise ValueError(f"QR码版本 ({qr.version}) 超出了最大支持版本 ({MAX_VERSION})。数据过大或复杂，请减小文本块大小。")
+        return encode(payload, version)
     except qrcode.exceptions.DataOverflowError:
         # 数据溢出错误处理
         raise ValueError(f"文本块太大，无法编码为QR码。请减小chunk_size值。当前块大小: {len(text)}字符")
-    
-    # 生成图像
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # 确保目录存在
-    os.makedirs(output_dir, exist_ok=True)
-    filename = os.path.join(output_dir, f"qrcode_{index:03d}.png")
-    img.save(filename)
-    return filename
 
-def arrange_qr_codes_in_array(filenames, rows=None, cols=None, output_file="qr_array.png"):
-    """将多个QR码排列成网格，确保大小一致且不会截断"""
-    if not filenames:
+def _render_qr_code(modules):
+    """将QR码模块矩阵渲染为内存中的1位黑白PIL图像
+
+    直接把模块矩阵放大为像素，不经过qr.make_image逐模块绘制矩形。
+    """
+    n = modules.shape[0]
+    border = QR_BORDER * QR_BOX_SIZE
+    # 预先分配全白画布（含四周的白色静区），再把放大后的模块直接写入中间区域
+    pixels = np.ones(((n + 2 * QR_BORDER) * QR_BOX_SIZE,) * 2, dtype=bool)
+    # 1位图像中True为白色，模块矩阵中True为黑色模块，取反；
+    # 每个模块放大为QR_BOX_SIZE×QR_BOX_SIZE像素
+    pixels[border:border + n * QR_BOX_SIZE, border:border + n * QR_BOX_SIZE] = \
+        np.repeat(np.repeat(~modules, QR_BOX_SIZE, axis=0), QR_BOX_SIZE, axis=1)
+    # 直接保留在内存中交给排列步骤，避免PNG编码/解码往返
+    return Image.fromarray(pixels)
+
+def generate_qr_code(text, index, version=None):
+    """生成单个QR码，返回内存中的PIL图像"""
+    modules, _ = _build_qr_code(text, index, version)
+    return _render_qr_code(modules)
+
+def _gen_one(item, version=None):
+    """进程池任务：为 (索引, 文本块) 生成QR码，需定义在模块顶层以便pickle"""
+    index, chunk = item
+    return generate_qr_code(chunk, index, version)
+
+@lru_cache(maxsize=128)
+def _choose_grid(count, width, height, target_aspect=ARRAY_TARGET_ASPECT):
+    """为count个width×height的QR码选择列数和行数
+
+    在空位不超过count//4的网格中，选择整体宽高比最接近target_aspect的一个，
+    避免近似正方形排列在数量不合适时产生大量空白。
+    """
+    best = None
+    for cols in range(1, count + 1):
+        rows = int(math.ceil(count / cols))
+        wasted = rows * cols - count
+        if wasted > count // 4:
+            continue
+        total_width = cols * width + (cols - 1) * QR_CODE_SPACING + 2 * QR_CODE_MARGIN
+        total_height = rows * height + (rows - 1) * QR_CODE_SPACING + 2 * QR_CODE_MARGIN
+        score = (abs(total_width / total_height - target_aspect), wasted)
+        if best is None or score < best[0]:
+            best = (score, cols, rows)
+    return best[1], best[2]
+
+def arrange_qr_codes_in_array(images, rows=None, cols=None, output_file="qr_array.png", png_level=PNG_COMPRESS_LEVEL):
+    """将多个QR码图像排列成网格，确保大小一致且不会截断
+
+    png_level为输出PNG的zlib压缩级别（0-9），越低写入越快，越高文件越小。
+    """
+    if not images:
         return None
     
-    # 加载图像
-    images = [Image.open(filename) for filename in filenames]
-    
     # 找出所有QR码中的最大宽度和高度
     max_width = max(img.width for img in images)
     max_height = max(img.height for img in images)
@@ -69,14 +212,21 @@ def arrange_qr_codes_in_array(filenames, rows=None, cols=None, output_file="qr_a
     print(f"检测到QR码最大尺寸: {max_width}x{max_height}像素")
     
     # 规范化所有QR码尺寸到一致大小
-    normalized_images = []
-    for img in images:
-        # 如果图片尺寸已经是最大尺寸，则直接添加
-        if img.width == max_width and img.height == max_height:
-            normalized_images.append(img)
-        else:
+    min_width = min(img.width for img in images)
+    min_height = min(img.height for img in images)
+    if min_width == max_width and min_height == max_height:
+        # 同一批次通常共用同一版本，尺寸全部一致时跳过规范化
+        normalized_images = images
+    else:
+        normalized_images = []
+        for img in images:
+            # 如果图片尺寸已经是最大尺寸，则直接添加
+            if img.size == (max_width, max_height):
+                normalized_images.append(img)
+                continue
+            
             # 创建新的白色背景图像，大小为最大尺寸
-            new_img = Image.new('RGB', (max_width, max_height), color='white')
+            new_img = Image.new('1', (max_width, max_height), color=1)
             
             # 计算居中位置
             x_offset = (max_width - img.width) // 2
@@ -88,9 +238,8 @@ def arrange_qr_codes_in_array(filenames, rows=None, cols=None, output_file="qr_a
     
     # 自动计算行数和列数
     if rows is None and cols is None:
-        # 默认为近似正方形排列
-        cols = int(math.ceil(math.sqrt(len(normalized_images))))
-        rows = int(math.ceil(len(normalized_images) / cols))
+        # 默认按目标宽高比选择空位较少的网格
+        cols, rows = _choose_grid(len(normalized_images), max_width, max_height)
     elif rows is None:
         rows = int(math.ceil(len(normalized_images) / cols))
     elif cols is None:
@@ -100,64 +249,264 @@ def arrange_qr_codes_in_array(filenames, rows=None, cols=None, output_file="qr_a
     total_width = cols * max_width + (cols - 1) * QR_CODE_SPACING + 2 * QR_CODE_MARGIN
     total_height = rows * max_height + (rows - 1) * QR_CODE_SPACING + 2 * QR_CODE_MARGIN
     
-    # 创建空白图像，包括额外边距
-    result = Image.new('RGB', (total_width, total_height), color='white')
+    # 创建空白画布（白色），包括额外边距
+    # QR码只有黑白两色，画布使用1位模式，内存与PNG编码数据量约为RGB的1/24
+    # 规范化后所有QR码尺寸一致，网格填充是规则的跨步拷贝，直接用NumPy切片赋值，
+    # 避免逐个调用PIL的paste
+    canvas = np.ones((total_height, total_width), dtype=bool)
     
-    # 将QR码填充到网格中，考虑间距和边距
-    for idx, img in enumerate(normalized_images):
-        if idx >= rows * cols:
-            break  # 防止索引越界
+    # 将QR码按行列填充到网格中，考虑间距和边距
+    # 行列步长预先算好，逐行逐列遍历，超出网格容量的图像不填充
+    stride_x = max_width + QR_CODE_SPACING
+    stride_y = max_height + QR_CODE_SPACING
+    count = len(normalized_images)
+    for row in range(rows):
+        y = QR_CODE_MARGIN + row * stride_y
+        for col in range(cols):
+            idx = row * cols + col
+            if idx >= count:
+                break
             
-        row = idx // cols
-        col = idx % cols
-        
-        # 计算带间距和边距的位置
-        x = QR_CODE_MARGIN + col * (max_width + QR_CODE_SPACING)
-        y = QR_CODE_MARGIN + row * (max_height + QR_CODE_SPACING)
-        
-        # 粘贴图像
-        result.paste(img, (x, y))
+            img = normalized_images[idx]
+            if img.mode != '1':
+                img = img.convert('1', dither=Image.Dither.NONE)
+            
+            # 块赋值
+            x = QR_CODE_MARGIN + col * stride_x
+            canvas[y:y + max_height, x:x + max_width] = np.asarray(img)
     
-    # 保存结果
-    result.save(output_file)
+    result = Image.fromarray(canvas)
+    
+    # 保存结果，使用大缓冲区写入并降低压缩级别以加快编码
+    with open(output_file, 'wb', buffering=PNG_WRITE_BUFFER_SIZE) as fp:
+        result.save(fp, format='PNG', optimize=False, compress_level=png_level)
     print(f"QR码阵列已保存为 {output_file}")
     return output_file
 
-def clean_temp_directory(temp_dir=DEFAULT_TEMP_DIR):
-    """清理临时文件夹及其所有内容"""
+def _get_process_pool():
+    """返回复用的进程池（工作进程数为CPU数，按需启动）；进程池无法启动过时返回None
+
+    使用spawn方式启动子进程：调用方（如图形界面）通常在工作线程中生成QR码，
+    在多线程进程中fork不安全；各平台行为也因此保持一致。
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None and not _process_pool_disabled:
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+def _discard_process_pool(executor):
+    """丢弃已损坏的进程池，下次并行生成时重新创建；从未完成过任务的进程池视为无法启动"""
+    global _process_pool, _process_pool_disabled, _process_pool_ready
+    with _process_pool_lock:
+        if _process_pool is executor:
+            _process_pool = None
+            if not _process_pool_ready:
+                _process_pool_disabled = True
+            _process_pool_ready = False
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _generate_qr_images(chunks):
+    """按顺序为可迭代的文本块生成QR码图像列表"""
+    global _process_pool_ready
+    total = len(chunks) if hasattr(chunks, '__len__') else None
+    chunks = iter(chunks)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return []
+    
+    # 先生成第一个块并记录其版本，其余块直接使用该版本，跳过版本探测
+    first_modules, version = _build_qr_code(first_chunk, 0)
+    images = [_render_qr_code(first_modules)]
+    
+    # 块数较少或只有一个CPU时直接在当前进程中生成
+    cpu_count = os.cpu_count() or 1
+    head = list(islice(chunks, PARALLEL_MIN_CHUNKS))
+    items = enumerate(chain(head, chunks), start=1)
+    executor = None
+    if len(head) >= PARALLEL_MIN_CHUNKS and cpu_count >= 2:
+        executor = _get_process_pool()
+    if executor is None:
+        for i, chunk in items:
+            images.append(generate_qr_code(chunk, i, version))
+        return images
+    
+    # QR码编码（RS纠错与掩码评估）为CPU密集型且各块互相独立，使用进程池并行生成；
+    # qrcode的掩码评分在Python层执行并持有GIL，因此不使用线程池。
+    # 按提交顺序取回结果，保证图像与块索引一致；同时最多提交PARALLEL_WINDOW_FACTOR倍
+    # 工作进程数的块（工作进程数不超过剩余块数），避免流式输入被一次性读入内存，
+    # 也限制了单次调用占用的工作进程，进程池由多个线程共用
+    workers = cpu_count if total is None else min(cpu_count, total - 1)
+    window = workers * PARALLEL_WINDOW_FACTOR
+    pending = deque()
+    unsent = None
     try:
-        if os.path.exists(temp_dir) and os.path.isdir(temp_dir):
-            print(f"正在删除临时文件夹 '{temp_dir}' 及其所有内容...")
-            shutil.rmtree(temp_dir)
-            print(f"临时文件夹 '{temp_dir}' 已成功删除")
-        else:
-            print(f"临时文件夹 '{temp_dir}' 不存在，无需清理")
-    except Exception as e:
-        print(f"清理临时文件夹时出错: {str(e)}")
-
-def create_qr_array(text, chunk_size=100, rows=None, cols=None, output_file="qr_array.png", temp_dir=DEFAULT_TEMP_DIR):
-    """主函数：分割文本、生成多个QR码并排列成阵列"""
+        for i, chunk in items:
+            if len(pending) >= window:
+                images.append(pending[0][2].result())
+                pending.popleft()
+                _process_pool_ready = True
+            # memoryview无法pickle，提交给子进程前转为bytes
+            if isinstance(chunk, memoryview):
+                chunk = bytes(chunk)
+            unsent = (i, chunk)
+            pending.append((i, chunk, executor.submit(_gen_one, unsent, version)))
+            unsent = None
+        while pending:
+            images.append(pending[0][2].result())
+            pending.popleft()
+            _process_pool_ready = True
+    except BrokenProcessPool:
+        # 工作进程异常退出（被终止，或调用脚本缺少 __main__ 保护导致子进程无法启动），
+        # 丢弃进程池，尚未取得结果的块改为在当前进程中生成
+        _discard_process_pool(executor)
+        print("QR码生成进程池异常退出，剩余的QR码改为在当前进程中生成")
+        retry = [(i, chunk) for i, chunk, _ in pending]
+        if unsent is not None:
+            retry.append(unsent)
+        for i, chunk in chain(retry, items):
+            images.append(generate_qr_code(chunk, i, version))
+    
+    return images
+
+def _read_chunks(reader, chunk_size):
+    """逐块读取reader直到流结束（兼容返回bytes或str的reader）"""
+    while (chunk := reader.read(chunk_size)):
+        yield chunk
+
+def _array_cache_key(text, chunk_size, rows, cols, png_level):
+    """根据输入内容和布局参数计算阵列缓存键"""
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        # 字节与文本的编码方式不同，生成的QR码也不同，需区分
+        kind, data = 'b', text
+    else:
+        kind, data = 's', text.encode('utf-8')
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return f"v{ARRAY_CACHE_FORMAT}_{kind}{digest}_{chunk_size}_{rows}_{cols}_z{png_level}"
+
+def _store_array_cache(array_file, cache_file):
+    """将生成的阵列写入缓存：先写入同目录的临时文件再原子替换，写入中断不会留下不完整的缓存"""
+    cache_dir = os.path.dirname(cache_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_file = tempfile.mkstemp(dir=cache_dir, prefix='.', suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copyfile(array_file, temp_file)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+    _prune_array_cache(cache_dir)
+
+def _prune_array_cache(cache_dir, max_bytes=ARRAY_CACHE_MAX_BYTES):
+    """按修改时间（命中缓存时会更新）保留最近使用的缓存，总大小不超过max_bytes"""
+    now = time.time()
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith('.tmp'):
+                # 写入中断残留的临时文件
+                if now - st.st_mtime > ARRAY_CACHE_TEMP_MAX_AGE:
+                    entries.append((0, 0, entry.path))
+            elif entry.name.endswith('.png') and entry.is_file():
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    
+    # 从最近使用的开始累计，超出上限的全部删除
+    entries.sort(reverse=True)
+    total = 0
+    for mtime, size, path in entries:
+        total += size
+        if mtime and total <= max_bytes:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def create_qr_array(text, chunk_size=100, rows=None, cols=None, output_file="qr_array.png", cache_dir=None,
+                    png_level=PNG_COMPRESS_LEVEL):
+    """主函数：分割文本、生成多个QR码并排列成阵列
+
+    text可以是str，也可以是ASCII字节数据（bytes/bytearray/memoryview），
+    后者按字节零拷贝分割，适用于Base64等大块载荷。
+    cache_dir为缓存目录（如DEFAULT_CACHE_DIR），默认None不使用阵列缓存。
+    png_level为输出PNG的压缩级别（0-9）。
+    
+    块数较多时使用spawn方式的进程池并行生成，子进程会重新导入调用脚本，
+    在脚本中直接调用时应放在 if __name__ == '__main__': 之下；缺少保护时进程池无法启动，
+    自动退回在当前进程中生成。
+    """
+    # 相同输入和参数生成的阵列完全相同，命中缓存时直接复制
+    cache_file = None
+    if cache_dir is not None and len(text) > 0:
+        cache_file = os.path.join(cache_dir, _array_cache_key(text, chunk_size, rows, cols, png_level) + ".png")
+        if os.path.isfile(cache_file):
+            shutil.copyfile(cache_file, output_file)
+            # 更新修改时间，清理缓存时按最近使用保留
+            try:
+                os.utime(cache_file)
+            except OSError:
+                pass
+            num_chunks = int(math.ceil(len(text) / chunk_size))
+            print(f"命中QR码阵列缓存，已复制到 {output_file}")
+            return output_file, num_chunks
+    
     # 分割文本
-    chunks = split_text(text, chunk_size)
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        chunks = split_bytes(text, chunk_size)
+    else:
+        chunks = split_text(text, chunk_size)
     print(f"文本已分割为 {len(chunks)} 个块")
     
-    # 为每个块生成QR码
-    filenames = []
     try:
-        for i, chunk in enumerate(chunks):
-            filename = generate_qr_code(chunk, i, temp_dir)
-            filenames.append(filename)
+        # 为每个块生成QR码
+        images = _generate_qr_images(chunks)
         
         # 将QR码排列为阵列
-        array_file = arrange_qr_codes_in_array(filenames, rows, cols, output_file)
+        array_file = arrange_qr_codes_in_array(images, rows, cols, output_file, png_level)
+        
+        # 写入缓存，失败不影响本次结果
+        if cache_file is not None and array_file:
+            try:
+                _store_array_cache(array_file, cache_file)
+            except OSError as e:
+                print(f"写入QR码阵列缓存时出错: {str(e)}")
         
         return array_file, len(chunks)
     except ValueError as e:
         # 重新抛出错误以便上层捕获
         raise ValueError(str(e))
-    finally:
-        # 清理临时文件和文件夹
-        clean_temp_directory(temp_dir)
+
+def create_qr_array_streaming(reader, chunk_size=100, rows=None, cols=None, output_file="qr_array.png",
+                              png_level=PNG_COMPRESS_LEVEL):
+    """从字节流逐块读取数据并生成QR码阵列，不在内存中拼接完整载荷
+
+    reader需提供read(n)方法并返回ASCII字节（如Base64数据），原始无缓冲流会
+    自动包装为带缓冲的读取器。流式输入没有完整内容可供计算哈希，因此不使用阵列缓存。
+    """
+    if isinstance(reader, io.RawIOBase):
+        reader = io.BufferedReader(reader, buffer_size=STREAM_READ_BUFFER_SIZE)
+    
+    try:
+        # 逐块读取，直到流结束
+        images = _generate_qr_images(_read_chunks(reader, chunk_size))
+        print(f"数据流已分割为 {len(images)} 个块")
+        
+        # 将QR码排列为阵列
+        array_file = arrange_qr_codes_in_array(images, rows, cols, output_file, png_level)
+        
+        return array_file, len(images)
+    except ValueError as e:
+        # 重新抛出错误以便上层捕获
+        raise ValueError(str(e))
 
 if __name__ == "__main__":
     # 测试
@@ -10,12 +10,57 @@
 - 自动适应窗口大小
 """
 
+import os
+import threading
+from collections import OrderedDict
+
 from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
-from PyQt6.QtGui import QPixmap, QWheelEvent, QPainter, QColor
-from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QWheelEvent, QPainter, QColor
+from PyQt6.QtCore import Qt, QRectF, QSize, pyqtSignal
+
+# 预览图像最长边的上限（像素），视口尚未布局时也按此上限解码
+PREVIEW_MAX_SIDE = 1600
+
+# 预览图像缓存的最大条目数
+PREVIEW_CACHE_SIZE = 4
+
+
+def _to_compact_format(image):
+    """将只含灰度的图像转换为8位灰度格式（QR码阵列只有黑白两色，无需32位彩色）
+
+    1位黑白图像保持不变；彩色图像（如带彩色标注的可视化调试图像）保持原格式。
+    """
+    if image.format() in (QImage.Format.Format_Mono, QImage.Format.Format_MonoLSB,
+                          QImage.Format.Format_Grayscale8):
+        return image
+    if not image.isGrayscale():
+        return image
+    return image.convertToFormat(QImage.Format.Format_Grayscale8)
+
+
+def read_preview_image(image_path, bound):
+    """按尺寸上限解码缩小后的预览图像，返回 (图像, 原始尺寸)，读取失败时图像为None
+
+    只使用QImage，可以在非界面线程中调用。
+    """
+    reader = QImageReader(image_path)
+    image_size = reader.size()
+    if image_size.isValid():
+        target = image_size.scaled(bound, Qt.AspectRatioMode.KeepAspectRatio)
+        if target.width() < image_size.width():
+            reader.setScaledSize(target)
+    image = reader.read()
+    if image.isNull():
+        return None, None
+    if not image_size.isValid():
+        image_size = image.size()
+    return _to_compact_format(image), image_size
 
 
 class ZoomableImageViewer(QGraphicsView):
+    # 后台线程读取完原始分辨率图像后发出（图像路径, 图像）
+    full_image_loaded = pyqtSignal(str, QImage)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -43,8 +88,8 @@ class ZoomableImageViewer(QGraphicsView):
         self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
         self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
         
-        # 适应视图模式
-        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        # 只重绘变化区域，平移/缩放时不必每次重绘整个视口
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
         
         # 跟踪缩放级别
         self.zoom_factor = 1.0
@@ -54,36 +99,113 @@ class ZoomableImageViewer(QGraphicsView):
         # 当前加载的图像路径
         self.current_image_path = None
         
+        # 图像原始尺寸；按视口分辨率解码的预览图像；原始分辨率图像（放大时后台加载）
+        self._image_size = None
+        self._preview_pixmap = None
+        self._full_pixmap = None
+        self._full_loading = False
+        self.full_image_loaded.connect(self._on_full_image_loaded)
+        
+        # 最近解码的预览图像：(路径, 修改时间, 文件大小, 预览尺寸上限) -> (原始尺寸, 预览图像)
+        self._preview_cache = OrderedDict()
+        
         # 设置提示文本
         self.setToolTip("滚轮: 缩放 | 拖动: 平移")
 
-    def load_image(self, image_path):
-        """加载图像并调整视图大小"""
+    def preview_bound(self):
+        """预览图像的尺寸上限：视口大小，最长边不超过 PREVIEW_MAX_SIDE"""
+        bound = self.viewport().size().boundedTo(QSize(PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE))
+        if bound.isEmpty():
+            bound = QSize(PREVIEW_MAX_SIDE, PREVIEW_MAX_SIDE)
+        return bound
+
+    def load_image(self, image_path, preview=None):
+        """加载图像并调整视图大小
+
+        按视口大小（最长边不超过 PREVIEW_MAX_SIDE）直接解码缩小后的图像，
+        避免在界面线程上解码全分辨率大图；
+        放大到超过预览分辨率时再在后台加载原始分辨率图像。
+        preview 可以传入已在后台线程中由 read_preview_image 解码好的结果。
+        """
         if not image_path:
             return False
+        
+        bound = self.preview_bound()
+        
+        # 同一文件未被修改时直接复用已解码的预览
+        try:
+            st = os.stat(image_path)
+            cache_key = (image_path, st.st_mtime_ns, st.st_size, bound.width(), bound.height())
+        except OSError:
+            cache_key = None
+        cached = self._preview_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            self._preview_cache.move_to_end(cache_key)
+            image_size, pixmap = cached
+        else:
+            if preview is None:
+                preview = read_preview_image(image_path, bound)
+            image, image_size = preview
+            if image is None or image.isNull():
+                return False
             
-        pixmap = QPixmap(image_path)
-        if pixmap.isNull():
+            pixmap = QPixmap.fromImage(image)
+            if cache_key:
+                self._preview_cache[cache_key] = (image_size, pixmap)
+                while len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+                    self._preview_cache.popitem(last=False)
+        
+        self._show_pixmap(image_path, image_size, pixmap)
+        return True
+        
+    def clear_image(self):
+        """清除当前显示的图像（保留图像项，以便之后继续加载）"""
+        self.image_item.setPixmap(QPixmap())
+        self.current_image_path = None
+        self._image_size = None
+        self._preview_pixmap = None
+        self._full_pixmap = None
+        self._full_loading = False
+        self.scene.setSceneRect(QRectF())
+        self.resetTransform()
+        self.zoom_factor = 1.0
+
+    def load_qimage(self, image):
+        """显示内存中的图像（例如从剪贴板粘贴的图像），图像本身即为原始分辨率"""
+        if image is None or image.isNull():
             return False
-            
+        self._show_pixmap(None, image.size(), QPixmap.fromImage(_to_compact_format(image)))
+        return True
+
+    def _show_pixmap(self, image_path, image_size, pixmap):
+        """显示预览图像并重置视图（image_size 为原始尺寸，pixmap 可以是缩小后的预览）"""
         # 更新图像项
+        self._image_size = image_size
+        self._preview_pixmap = pixmap
+        # 预览已是原始分辨率时无需再加载
+        self._full_pixmap = pixmap if pixmap.size() == image_size else None
+        self._full_loading = False
         self.image_item.setPixmap(pixmap)
+        self.image_item.setScale(image_size.width() / pixmap.width())
+        
+        # 保存当前图像路径
+        self.current_image_path = image_path
         
         # 重置变换
         self.resetTransform()
         self.zoom_factor = 1.0
         
-        # 调整场景大小
-        self.scene.setSceneRect(QRectF(pixmap.rect()))
+        # 调整场景大小（使用原始图像坐标）
+        self.scene.setSceneRect(QRectF(0, 0, image_size.width(), image_size.height()))
         
         # 调整视图以适应场景
         self.fit_in_view()
-        
-        # 保存当前图像路径
-        self.current_image_path = image_path
-        
-        return True
-        
+
+    @property
+    def image_size(self):
+        """当前图像的原始尺寸（QSize），未加载图像时为None"""
+        return self._image_size
+
     def fit_in_view(self):
         """调整视图以适应整个图像"""
         if self.image_item.pixmap().isNull():
@@ -95,6 +217,51 @@ class ZoomableImageViewer(QGraphicsView):
         # 更新缩放系数
         transform = self.transform()
         self.zoom_factor = transform.m11()  # 水平缩放系数
+        self._update_display_pixmap()
+    
+    def _update_display_pixmap(self):
+        """根据缩放系数切换显示的图像分辨率
+
+        显示所需的像素不超过预览分辨率时使用预览图像，否则使用原始分辨率图像，
+        尚未加载时在后台线程中读取，加载完成前继续显示预览。
+        """
+        if self._preview_pixmap is None:
+            return
+        
+        needs_full = self.zoom_factor * self._image_size.width() > self._preview_pixmap.width()
+        if needs_full and self._full_pixmap is None:
+            self._request_full_image()
+        pixmap = self._full_pixmap if needs_full and self._full_pixmap is not None else self._preview_pixmap
+        
+        if self.image_item.pixmap().cacheKey() != pixmap.cacheKey():
+            self.image_item.setPixmap(pixmap)
+            # 缩放图像项，使其在场景中始终占据原始尺寸
+            self.image_item.setScale(self._image_size.width() / pixmap.width())
+    
+    def _request_full_image(self):
+        """在后台线程中读取原始分辨率图像"""
+        if self._full_loading or not self.current_image_path:
+            return
+        self._full_loading = True
+        image_path = self.current_image_path
+        
+        def load():
+            # QImage可以在非界面线程中创建，QPixmap则必须在界面线程中转换
+            image = QImageReader(image_path).read()
+            self.full_image_loaded.emit(image_path, image if image.isNull() else _to_compact_format(image))
+        
+        threading.Thread(target=load, daemon=True).start()
+    
+    def _on_full_image_loaded(self, image_path, image):
+        """原始分辨率图像加载完成（在界面线程中执行）"""
+        # 加载期间已切换到其他图像时丢弃结果
+        if image_path != self.current_image_path:
+            return
+        self._full_loading = False
+        if image.isNull():
+            return
+        self._full_pixmap = QPixmap.fromImage(image)
+        self._update_display_pixmap()
 
     def wheelEvent(self, event: QWheelEvent):
         """处理鼠标滚轮事件以实现缩放"""
@@ -125,9 +292,10 @@ class ZoomableImageViewer(QGraphicsView):
         elif new_zoom > self.max_zoom:
             zoom_factor = self.max_zoom / self.zoom_factor
             
-        # 应用缩放
+        # 应用缩放（只做增量缩放，不重置变换）
         self.scale(zoom_factor, zoom_factor)
         self.zoom_factor *= zoom_factor
+        self._update_display_pixmap()
         
     def resizeEvent(self, event):
         """处理窗口大小调整事件"""
@@ -14,27 +14,115 @@
 
 import os
 import sys
+import stat
+import bisect
+import codecs
+import logging
 import time
-import traceback
-import tempfile
+import threading
+from collections import deque
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QTextEdit, QFileDialog, QSpinBox, QTabWidget,
-    QGroupBox, QFormLayout, QLineEdit, QMessageBox, QComboBox, QSplitter,
-    QCheckBox, QProgressBar, QPlainTextEdit, QScrollArea, QStyle,
+    QPushButton, QLabel, QFileDialog, QSpinBox, QTabWidget,
+    QGroupBox, QFormLayout, QLineEdit, QMessageBox, QSplitter,
+    QCheckBox, QProgressBar, QPlainTextEdit, QStyle,
     QStyleFactory
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QMimeData, QEvent
-from PyQt6.QtGui import QPixmap, QImage, QFont, QIntValidator, QTextOption, QIcon, QDragEnterEvent, QDropEvent, QKeyEvent, QClipboard, QColor
+from PyQt6.QtCore import Qt, QEvent, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt6.QtGui import QImage, QTextOption, QDragEnterEvent, QDropEvent, QKeyEvent, QColor
 
-# 导入QR码阵列生成与读取功能
-from generate_qr_array import create_qr_array
-from read_qr_array import read_qr_array
-from qr_code_file_transfer import encode_file_to_qr_array, decode_qr_array_to_file
+# QR码阵列生成与读取功能依赖qrcode/PIL/OpenCV/numpy/pyzbar，导入较慢，
+# 因此在启动时由后台线程预先导入；界面线程从不等待导入，任务在工作线程中确认导入完成。
+# 导入失败（例如未安装zbar库）时记录异常，操作时提示用户而不是让异常逃出Qt槽函数
+create_qr_array = None
+encode_file_to_qr_array = None
+decode_qr_array_to_file = None
+debug_image_path = None
+DEFAULT_CACHE_DIR = None
+_prewarm_thread = None
+_backend_ready = threading.Event()
+_backend_error = None
+_backend_lock = threading.Lock()
+
+def _import_backend():
+    """导入QR码阵列生成与读取功能"""
+    global create_qr_array, encode_file_to_qr_array, decode_qr_array_to_file, debug_image_path, DEFAULT_CACHE_DIR
+    from generate_qr_array import create_qr_array as _create, DEFAULT_CACHE_DIR as _cache_dir
+    from qr_code_file_transfer import encode_file_to_qr_array as _encode, decode_qr_array_to_file as _decode
+    from read_qr_array import debug_image_path as _debug_path
+    create_qr_array, encode_file_to_qr_array, decode_qr_array_to_file = _create, _encode, _decode
+    debug_image_path = _debug_path
+    DEFAULT_CACHE_DIR = _cache_dir
+
+def _load_backend():
+    """导入后端（只执行一次），失败时记录异常"""
+    global _backend_error
+    with _backend_lock:
+        if _backend_ready.is_set():
+            return
+        try:
+            _import_backend()
+        except Exception as e:
+            _backend_error = e
+            print(f"加载QR码处理功能失败: {type(e).__name__}: {e}")
+        finally:
+            _backend_ready.set()
+
+def _prewarm_backend():
+    """导入后端并预先完成一次极小的解码，让libzbar加载和OpenCV线程池初始化不落在首次解码上"""
+    _load_backend()
+    if _backend_error is not None:
+        return
+    try:
+        import cv2
+        import numpy as np
+        from pyzbar.pyzbar import decode
+        # 保留一个核心给界面线程
+        cv2.setNumThreads(max(1, (os.cpu_count() or 1) - 1))
+        blank = np.zeros((32, 32), np.uint8)
+        decode(blank)
+        cv2.QRCodeDetector().detectAndDecodeMulti(blank)
+    except Exception as e:
+        # 预热失败不影响使用，首次解码时再按正常流程加载
+        print(f"解码后端预热失败: {e}")
+
+def start_backend_prewarm():
+    """在后台线程中预先导入QR码阵列生成与读取功能"""
+    global _prewarm_thread
+    if _prewarm_thread is None:
+        _prewarm_thread = threading.Thread(target=_prewarm_backend, daemon=True)
+        _prewarm_thread.start()
+
+def backend_error():
+    """不阻塞地返回后端导入失败的异常；尚未导入完成或导入成功时返回None"""
+    return _backend_error if _backend_ready.is_set() else None
+
+def ensure_backend():
+    """确保QR码阵列生成与读取功能已导入，导入失败时抛出ImportError
+
+    会等待后台导入完成（不等待预热解码），应在工作线程中调用。
+    """
+    if not _backend_ready.is_set():
+        if _prewarm_thread is not None:
+            _backend_ready.wait()
+        else:
+            _load_backend()
+    if _backend_error is not None:
+        raise ImportError(f"QR码处理功能不可用: {_backend_error}") from _backend_error
+
+def run_backend(name, *args, use_array_cache=False, **kwargs):
+    """工作线程任务：确认后端已导入后调用其中名为name的函数
+
+    use_array_cache为True时使用默认缓存目录缓存生成的阵列。
+    """
+    ensure_backend()
+    if use_array_cache:
+        kwargs['cache_dir'] = DEFAULT_CACHE_DIR
+    return globals()[name](*args, **kwargs)
 
 # 导入图像查看器
-from image_viewer import ZoomableImageViewer
+from image_viewer import ZoomableImageViewer, read_preview_image
 
 # QR码相关常量
 QR_VERSION_MAX = 40  # QR码最大版本
@@ -48,6 +136,57 @@ QR_MAX_CHARS = {
     'utf8': 850             # UTF-8通用估计值（更保守的设置，考虑QR版本限制）
 }
 
+# QR码各版本在L级别错误校正、字节模式下的最大容量（字节），下标0对应版本1
+QR_BYTE_CAPACITY_L = (
+    17, 32, 53, 78, 106, 134, 154, 192, 230, 271,
+    321, 367, 425, 458, 520, 586, 644, 718, 792, 858,
+    929, 1003, 1091, 1171, 1273, 1367, 1465, 1528, 1628, 1732,
+    1840, 1952, 2068, 2188, 2303, 2431, 2563, 2699, 2809, 2953,
+)
+
+# 每个QR码数据前的索引头 "IDX:nnn:" 的长度（字节）
+QR_INDEX_HEADER_BYTES = 8
+
+def estimate_qr_version(byte_count):
+    """估算容纳指定字节数（不含索引头）所需的最小QR码版本，超出最大容量时返回None"""
+    # 容量表单调递增，二分查找第一个容量不小于所需字节数的版本
+    version = bisect.bisect_left(QR_BYTE_CAPACITY_L, byte_count + QR_INDEX_HEADER_BYTES) + 1
+    return version if version <= QR_VERSION_MAX else None
+
+def max_chunk_utf8_bytes(text, chunk_size):
+    """按字符数分块后，返回最大块的UTF-8字节数"""
+    return max(
+        (len(text[i:i + chunk_size].encode('utf-8')) for i in range(0, len(text), chunk_size)),
+        default=0
+    )
+
+# 超过此字符数的粘贴（且输入框为空）直接整体设置文本
+LARGE_PASTE_CHARS = 100_000
+
+# 解码剪贴板图像时在图像路径框中显示的名称
+PASTED_IMAGE_LABEL = "<剪贴板图像>"
+
+# 解码结果预览读取的字节数和显示的最大字符数
+PREVIEW_READ_BYTES = 2048
+PREVIEW_MAX_CHARS = 500
+
+def char_count_state(count, max_chars, warning_threshold):
+    """返回字符计数状态：0 正常，1 接近限制，2 超出限制"""
+    if count > max_chars:
+        return 2
+    if count > max_chars * warning_threshold:
+        return 1
+    return 0
+
+# 日志刷新间隔（毫秒）和日志控件保留的最大行数
+LOG_FLUSH_INTERVAL_MS = 30
+LOG_MAX_BLOCKS = 5000
+# 内存中保留的日志条数上限（用于导出）
+LOG_MAX_ENTRIES = 10000
+LOG_TRUNCATED_MARKER = f"日志已截断：只保留最近 {LOG_MAX_ENTRIES} 条记录"
+# 导出日志时的写入块大小（字节）
+LOG_EXPORT_BUFFER_SIZE = 64 * 1024
+
 # QR码块大小推荐值（字符数限制，基于不同类型文本）
 QR_RECOMMENDED_CHUNK_SIZE = {
     'plain_ascii': 850,     # 纯ASCII文本（较大值）
@@ -55,101 +194,231 @@ QR_RECOMMENDED_CHUNK_SIZE = {
     'chinese': 500,         # 中文/非ASCII文本（较大值）
 }
 
-# 工作线程类，用于在后台执行长时间操作
-class WorkerThread(QThread):
+logger = logging.getLogger(__name__)
+
+# 后台任务的信号（QRunnable不是QObject，不能直接定义信号）
+class WorkerSignals(QObject):
     finished = pyqtSignal(object)
     progress = pyqtSignal(str)
     error = pyqtSignal(str)
-    
-    def __init__(self, function, args=None, kwargs=None):
+
+# 后台任务类，在共享线程池中执行长时间操作
+class WorkerRunnable(QRunnable):
+    def __init__(self, function, args=None, kwargs=None, postprocess=None):
         super().__init__()
         self.function = function
         self.args = args or []
         self.kwargs = kwargs or {}
+        # 可选的后处理函数，同样在工作线程中执行，其返回值作为最终结果
+        self.postprocess = postprocess
+        self.signals = WorkerSignals()
     
     def run(self):
         try:
             result = self.function(*self.args, **self.kwargs)
-            self.finished.emit(result)
+            if self.postprocess is not None:
+                result = self.postprocess(result)
         except Exception as e:
-            self.error.emit(f"错误: {str(e)}\n{traceback.format_exc()}")
+            # 界面只需要简短的错误信息，完整的堆栈交给日志记录
+            logger.exception("后台任务执行失败")
+            self.signals.error.emit(f"{type(e).__name__}: {e}")
+            return
+        self.signals.finished.emit(result)
 
 # 自定义日志类，将日志输出重定向到界面
 class LogHandler:
     def __init__(self, text_widget):
         self.text_widget = text_widget
-        self.log_contents = []
+        self.log_contents = deque(maxlen=LOG_MAX_ENTRIES)
+        # 同一秒内的日志复用已格式化的时间戳
+        self._last_sec = 0
+        self._last_stamp = ''
+        # 内存中的日志是否已丢弃过最早的记录
+        self._truncated = False
+        # 待写入界面的日志，由定时器批量刷新，避免每行都触发一次重排和重绘
+        self._pending = []
+        # 单次定时器只在有待写入日志时启动，空闲时不产生定时事件
+        self._flush_timer = QTimer(text_widget)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
+    
+    def _timestamp(self):
+        sec = int(time.time())
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sec))
+        return self._last_stamp
     
     def write(self, message):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = f"[{timestamp}] {message}"
-        self.log_contents.append(log_entry)
-        self.text_widget.append(log_entry)
-        # 自动滚动到底部
-        self.text_widget.ensureCursorVisible()
+        # 多行消息一次写入，每行仍作为一条带时间戳的记录保存
+        timestamp = self._timestamp()
+        for line in message.split("\n"):
+            log_entry = f"[{timestamp}] {line}"
+            if not self._truncated and len(self.log_contents) == self.log_contents.maxlen:
+                # 第一次丢弃最早的记录时提示一次，之后不再重复
+                self._truncated = True
+                self._pending.append(f"[{timestamp}] {LOG_TRUNCATED_MARKER}")
+            self.log_contents.append(log_entry)
+            self._pending.append(log_entry)
+        # 已在等待刷新时不重新计时，保证持续输出日志时也能按时刷新
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+    
+    def _flush(self):
+        if not self._pending:
+            return
+        self.text_widget.appendPlainText("\n".join(self._pending))
+        # QPlainTextEdit 在滚动条位于底部时会自动跟随新追加的内容，
+        # 用户向上翻看日志时保持当前位置
+        self._pending.clear()
+    
+    def clear(self):
+        self._flush_timer.stop()
+        self._pending.clear()
+        self.log_contents.clear()
+        self._truncated = False
+        self.text_widget.clear()
     
     def export_log(self, filename):
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(self.log_contents))
+        # 逐行编码后按块写入，避免先拼接出整个日志字符串再整体编码
+        with open(filename, 'wb') as f:
+            buf = bytearray()
+            if self._truncated:
+                buf += LOG_TRUNCATED_MARKER.encode('utf-8') + b'\n'
+            for line in self.log_contents:
+                buf += line.encode('utf-8')
+                buf += b'\n'
+                if len(buf) >= LOG_EXPORT_BUFFER_SIZE:
+                    f.write(buf)
+                    buf.clear()
+            if buf:
+                f.write(buf)
         return True
 
 # 自定义纯文本编辑器，用于去除格式化内容
 class PlainTextInputWidget(QPlainTextEdit):
+    # 字符计数状态（0: 正常, 1: 接近限制, 2: 超出限制）对应的提示文字、标签样式和背景样式
+    _STATUS = ("正常", "接近限制", "超出限制")
+    _STYLES = ("color: black;", "color: orange; font-weight: bold;", "color: red; font-weight: bold;")
+    _BG = ("", "background-color: #fffaf0;", "background-color: #fff0f0;")  # 默认背景 / 轻微黄色 / 轻微红色
+    _TMPL = "字符数: {}/{} ({}) | {}"
+    _VERSION_TMPL = "预计QR码版本: {}"
+    _VERSION_OVERFLOW = "超出单个QR码最大容量"
+    _VERSION_PENDING = "预计QR码版本: 生成时计算"
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setPlaceholderText("在此输入或粘贴要编码的文本...\n注意：将自动移除所有粘贴的文本格式")
-        self.textChanged.connect(self.update_char_count)
+        # 字符计数做防抖处理，连续输入时只在停顿后更新一次
+        self._count_timer = QTimer(self)
+        self._count_timer.setSingleShot(True)
+        self._count_timer.setInterval(100)
+        self._count_timer.timeout.connect(self.update_char_count)
+        self.textChanged.connect(self._count_timer.start)
         self.char_count_label = None
         self.max_chars = QR_MAX_CHARS['utf8']
         self.warning_threshold = 0.8  # 80%警告阈值
+        self._last_state = None
+        self._cached_len = 0
+        # 最近一次估算的 (最大块字符数, QR码版本)，文档内容变化时失效
+        self._version_cache = None
+        self.document().contentsChanged.connect(self._invalidate_version)
         
         # 设置自动换行
         self.setWordWrapMode(QTextOption.WrapMode.WrapAtWordBoundaryOrAnywhere)
     
     def set_char_count_label(self, label):
         self.char_count_label = label
+        self._last_state = None
         self.update_char_count()
     
+    def char_count(self):
+        """返回当前文本的字符数（复用最近一次计数结果，计数尚在防抖等待中时立即更新）"""
+        if self._count_timer.isActive() or self.char_count_label is None:
+            self._count_timer.stop()
+            self._cached_len = self.document().characterCount() - 1
+            self.update_char_count()
+        return self._cached_len
+    
     def set_max_chars(self, max_chars):
         self.max_chars = max_chars
         self.update_char_count()
+    
+    def _invalidate_version(self):
+        self._version_cache = None
+    
+    def estimated_qr_version(self):
+        """按实际UTF-8字节数估算最大块所需的QR码版本（中文每字3字节，ASCII每字1字节），超出最大容量时返回None
+
+        需要复制并遍历整个文本，只在生成前调用；结果按文档内容和块大小缓存。
+        """
+        if self._version_cache is None or self._version_cache[0] != self.max_chars:
+            version = estimate_qr_version(max_chunk_utf8_bytes(self.toPlainText(), self.max_chars))
+            self._version_cache = (self.max_chars, version)
+            self.update_char_count()
+        return self._version_cache[1]
         
     def update_char_count(self):
         if self.char_count_label:
-            text = self.toPlainText()
-            count = len(text)
-            status = "正常"
-            style = "color: black;"
-            
-            if count > self.max_chars:
-                status = "超出限制"
-                style = "color: red; font-weight: bold;"
-            elif count > self.max_chars * self.warning_threshold:
-                status = "接近限制"
-                style = "color: orange; font-weight: bold;"
-                
-            self.char_count_label.setText(f"字符数: {count}/{self.max_chars} ({status})")
-            self.char_count_label.setStyleSheet(style)
+            # characterCount() 包含末尾的段落分隔符，无需复制整个文本
+            count = self.document().characterCount() - 1
+            self._cached_len = count
             
-            # 设置背景颜色以视觉提示字符限制
-            if count > self.max_chars:
-                self.setStyleSheet("background-color: #fff0f0;")  # 轻微红色背景
-            elif count > self.max_chars * self.warning_threshold:
-                self.setStyleSheet("background-color: #fffaf0;")  # 轻微黄色背景
+            # 实时计数只使用字符数；QR码版本在生成前估算，显示仍有效的估算结果
+            state = char_count_state(count, self.max_chars, self.warning_threshold)
+            if self._version_cache is None or self._version_cache[0] != self.max_chars:
+                version_info = self._VERSION_PENDING
+            elif self._version_cache[1] is None:
+                state = 2
+                version_info = self._VERSION_OVERFLOW
             else:
-                self.setStyleSheet("")  # 恢复默认背景
+                version_info = self._VERSION_TMPL.format(self._version_cache[1])
+            self.char_count_label.setText(self._TMPL.format(count, self.max_chars, self._STATUS[state], version_info))
+            
+            # 仅在状态变化时重新设置样式，避免频繁的样式重算
+            if state != self._last_state:
+                self._last_state = state
+                self.char_count_label.setStyleSheet(self._STYLES[state])
+                # 设置背景颜色以视觉提示字符限制
+                self.setStyleSheet(self._BG[state])
     
     def insertFromMimeData(self, source):
         # 仅粘贴纯文本，去除所有格式
         if source.hasText():
-            self.insertPlainText(source.text())
+            text = source.text()
+            # 插入期间屏蔽信号，插入完成后只触发一次字符计数
+            self.blockSignals(True)
+            try:
+                if self.document().isEmpty() and len(text) > LARGE_PASTE_CHARS:
+                    # 向空文档粘贴大段文本时整体设置，不生成与粘贴内容等大的撤销记录
+                    document = self.document()
+                    document.setUndoRedoEnabled(False)
+                    try:
+                        self.setPlainText(text)
+                    finally:
+                        document.setUndoRedoEnabled(True)
+                else:
+                    self.insertPlainText(text)
+            finally:
+                self.blockSignals(False)
+            self._count_timer.start()
+
+def qimage_to_array(image):
+    """将8位灰度QImage复制为NumPy数组（保存在内存中供OpenCV解码）"""
+    import numpy as np  # 只在粘贴图像时才需要，避免拖慢界面启动
+    ptr = image.constBits()
+    ptr.setsize(image.sizeInBytes())
+    # 每行可能有对齐填充，按bytesPerLine整形后截取有效宽度
+    rows = np.frombuffer(ptr, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width()].copy()
 
 # 添加可接收粘贴事件的标签组件
 class ImageDropZone(QWidget):
     """可以接收拖放和粘贴图像的区域"""
     
-    # 定义信号
-    image_pasted = pyqtSignal(str)
+    # 定义信号（灰度图像数组, 对应的QImage）
+    image_pasted = pyqtSignal(object, QImage)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -161,20 +430,17 @@ class ImageDropZone(QWidget):
         # 创建标签
         self.drop_label = QLabel("拖放图像到此处\n或按Ctrl+V粘贴")
         self.drop_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.drop_label.setStyleSheet("""
-            background-color: #f5f5f5;
-            border: 2px dashed #cccccc;
-            border-radius: 8px;
-            padding: 20px;
-            font-size: 14px;
-            color: #666666;
-        """)
+        self.drop_label.setObjectName("dropLabel")
         
         # 添加到布局
         layout.addWidget(self.drop_label)
         
         # 启用焦点
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        
+        # 缓存剪贴板对象；记录上次粘贴时间，忽略快速连续的重复粘贴
+        self._clipboard = QApplication.clipboard()
+        self._last_paste = 0.0
     
     def keyPressEvent(self, event: QKeyEvent):
         """处理键盘按键事件"""
@@ -186,7 +452,13 @@ class ImageDropZone(QWidget):
     
     def handle_paste(self):
         """处理粘贴事件"""
-        clipboard = QApplication.clipboard()
+        # 200毫秒内的重复粘贴直接忽略，避免反复从剪贴板读取图像
+        now = time.monotonic()
+        if now - self._last_paste < 0.2:
+            return
+        self._last_paste = now
+        
+        clipboard = self._clipboard
         mime_data = clipboard.mimeData()
         
         if mime_data.hasImage():
@@ -194,20 +466,15 @@ class ImageDropZone(QWidget):
             image = clipboard.image()
             
             if not image.isNull():
-                # 创建临时文件保存图像
-                temp_dir = tempfile.gettempdir()
-                temp_file = os.path.join(temp_dir, f"pasted_image_{int(time.time())}.png")
+                # 图像直接保留在内存中交给解码流程，不再写入临时PNG文件再读回
+                image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+                self.image_pasted.emit(qimage_to_array(image), image)
                 
-                # 保存图像
-                if image.save(temp_file, "PNG"):
-                    # 发出信号
-                    self.image_pasted.emit(temp_file)
-                    
-                    # 更新提示文本
-                    self.drop_label.setText(f"图像已从剪贴板粘贴\n{os.path.basename(temp_file)}")
-                    return
-        
-        # 如果没有图像或保存失败，显示错误消息
+                # 更新提示文本
+                self.drop_label.setText(f"图像已从剪贴板粘贴\n{image.width()}x{image.height()}")
+                return
+        
+        # 如果没有图像，显示错误消息
         self.drop_label.setText("无法从剪贴板粘贴图像\n请确保剪贴板包含有效图像")
 
 # 主窗口类
@@ -216,7 +483,15 @@ class QRArrayApp(QMainWindow):
         super().__init__()
         self.initUI()
         self.current_image_path = None
-        self.workers = []
+        self.current_image_size = None
+        self._last_preview_key = None
+        self._preview_token = 0
+        self._pasted_image = None
+        self._debug_source = None
+        self._file_stat = None
+        self._fd = None
+        self.pool = QThreadPool.globalInstance()
+        self._active_jobs = set()
         
         # 启用拖放
         self.setAcceptDrops(True)
@@ -229,6 +504,14 @@ class QRArrayApp(QMainWindow):
         # 设置应用样式
         self.setStyle(QStyleFactory.create('Fusion'))
         
+        # 同一标准图标只向样式请求一次，多个按钮共用
+        style = self.style()
+        icons = {}
+        def icon(standard_pixmap):
+            if standard_pixmap not in icons:
+                icons[standard_pixmap] = style.standardIcon(standard_pixmap)
+            return icons[standard_pixmap]
+        
         # 创建中央部件和主布局
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -259,7 +542,7 @@ class QRArrayApp(QMainWindow):
         
         # 添加说明标签
         input_info_label = QLabel("在此输入或粘贴要编码为QR码的文本。系统将自动移除粘贴文本的所有格式。")
-        input_info_label.setStyleSheet("color: #666; font-style: italic;")
+        input_info_label.setObjectName("hint")
         text_input_layout.addWidget(input_info_label)
         
         self.text_input = PlainTextInputWidget()
@@ -285,7 +568,7 @@ class QRArrayApp(QMainWindow):
         chunk_size_info = QLabel(
             "推荐值: 纯ASCII文本 (850), 混合文本 (700), 中文文本 (500)"
         )
-        chunk_size_info.setStyleSheet("color: #666; font-style: italic;")
+        chunk_size_info.setObjectName("hint")
         text_options_layout.addRow("", chunk_size_info)
         
         self.text_cols = QSpinBox()
@@ -306,20 +589,25 @@ class QRArrayApp(QMainWindow):
         output_file_layout.addWidget(self.text_output_file)
         
         self.text_output_browse = QPushButton("浏览...")
-        self.text_output_browse.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
-        self.text_output_browse.clicked.connect(self.browse_text_output)
+        self.text_output_browse.setIcon(icon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        self.text_output_browse.clicked.connect(self._bind_browser(
+            "save", self.text_output_file, "保存QR码阵列", "PNG图像 (*.png);;所有文件 (*)"))
         self.text_output_browse.setMaximumWidth(100)
         output_file_layout.addWidget(self.text_output_browse)
         
         text_options_layout.addRow("输出文件名:", output_file_layout)
         
+        self.text_use_cache = QCheckBox("缓存生成结果")
+        self.text_use_cache.setToolTip("相同输入与参数再次生成时直接复用缓存的阵列图像\n缓存目录: ~/.cache/multi_qrcode，总大小超过256MB时删除最久未使用的图像\n注意：缓存的图像包含编码的内容")
+        text_options_layout.addRow("", self.text_use_cache)
+        
         text_options_group.setLayout(text_options_layout)
         
         # 文本编码操作按钮
         text_actions_layout = QHBoxLayout()
         self.generate_text_button = QPushButton("生成QR码阵列")
-        self.generate_text_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
-        self.generate_text_button.setStyleSheet("font-weight: bold; padding: 8px;")
+        self.generate_text_button.setIcon(icon(QStyle.StandardPixmap.SP_DialogSaveButton))
+        self.generate_text_button.setObjectName("primaryAction")
         self.generate_text_button.clicked.connect(self.generate_text_qr_array)
         text_actions_layout.addWidget(self.generate_text_button)
         
@@ -346,7 +634,7 @@ class QRArrayApp(QMainWindow):
         file_path_layout.addWidget(self.file_path)
         
         self.file_browse = QPushButton("浏览...")
-        self.file_browse.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        self.file_browse.setIcon(icon(QStyle.StandardPixmap.SP_DialogOpenButton))
         self.file_browse.clicked.connect(self.browse_input_file)
         self.file_browse.setMaximumWidth(100)
         file_path_layout.addWidget(self.file_browse)
@@ -370,7 +658,7 @@ class QRArrayApp(QMainWindow):
             "较大的字符数可更有效地传输文件\n"
             "注意：使用高分辨率扫描设备以确保成功解码大型QR码"
         )
-        file_chunk_size_info.setStyleSheet("color: #666; font-style: italic;")
+        file_chunk_size_info.setObjectName("hint")
         file_options_layout.addRow("", file_chunk_size_info)
         
         self.file_cols = QSpinBox()
@@ -391,20 +679,24 @@ class QRArrayApp(QMainWindow):
         file_output_layout.addWidget(self.file_output_dir)
         
         self.file_output_browse = QPushButton("浏览...")
-        self.file_output_browse.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
-        self.file_output_browse.clicked.connect(self.browse_file_output_dir)
+        self.file_output_browse.setIcon(icon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        self.file_output_browse.clicked.connect(self._bind_browser("dir", self.file_output_dir, "选择输出目录"))
         self.file_output_browse.setMaximumWidth(100)
         file_output_layout.addWidget(self.file_output_browse)
         
         file_options_layout.addRow("输出目录:", file_output_layout)
         
+        self.file_use_cache = QCheckBox("缓存生成结果")
+        self.file_use_cache.setToolTip("相同输入与参数再次生成时直接复用缓存的阵列图像\n缓存目录: ~/.cache/multi_qrcode，总大小超过256MB时删除最久未使用的图像\n注意：缓存的图像包含编码的内容")
+        file_options_layout.addRow("", self.file_use_cache)
+        
         file_options_group.setLayout(file_options_layout)
         
         # 文件编码操作按钮
         file_actions_layout = QHBoxLayout()
         self.generate_file_button = QPushButton("生成QR码阵列")
-        self.generate_file_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
-        self.generate_file_button.setStyleSheet("font-weight: bold; padding: 8px;")
+        self.generate_file_button.setIcon(icon(QStyle.StandardPixmap.SP_DialogSaveButton))
+        self.generate_file_button.setObjectName("primaryAction")
         self.generate_file_button.clicked.connect(self.generate_file_qr_array)
         file_actions_layout.addWidget(self.generate_file_button)
         
@@ -431,7 +723,7 @@ class QRArrayApp(QMainWindow):
         image_path_layout.addWidget(self.image_path)
         
         self.image_browse = QPushButton("浏览...")
-        self.image_browse.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        self.image_browse.setIcon(icon(QStyle.StandardPixmap.SP_DialogOpenButton))
         self.image_browse.clicked.connect(self.browse_input_image)
         self.image_browse.setMaximumWidth(100)
         image_path_layout.addWidget(self.image_browse)
@@ -457,8 +749,8 @@ class QRArrayApp(QMainWindow):
         decode_output_layout.addWidget(self.decode_output_dir)
         
         self.decode_output_browse = QPushButton("浏览...")
-        self.decode_output_browse.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
-        self.decode_output_browse.clicked.connect(self.browse_decode_output_dir)
+        self.decode_output_browse.setIcon(icon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        self.decode_output_browse.clicked.connect(self._bind_browser("dir", self.decode_output_dir, "选择解码输出目录"))
         self.decode_output_browse.setMaximumWidth(100)
         decode_output_layout.addWidget(self.decode_output_browse)
         
@@ -473,8 +765,8 @@ class QRArrayApp(QMainWindow):
         # 解码操作按钮
         decode_actions_layout = QHBoxLayout()
         self.decode_button = QPushButton("解码QR码阵列")
-        self.decode_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogApplyButton))
-        self.decode_button.setStyleSheet("font-weight: bold; padding: 8px;")
+        self.decode_button.setIcon(icon(QStyle.StandardPixmap.SP_DialogApplyButton))
+        self.decode_button.setObjectName("primaryAction")
         self.decode_button.clicked.connect(self.decode_qr_array)
         decode_actions_layout.addWidget(self.decode_button)
         
@@ -503,17 +795,20 @@ class QRArrayApp(QMainWindow):
         log_layout = QVBoxLayout()
         log_layout.setContentsMargins(8, 8, 8, 8)
         
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
-        self.log_text.setStyleSheet("font-family: 'Consolas', 'Courier New', monospace;")
+        self.log_text.setMaximumBlockCount(LOG_MAX_BLOCKS)
+        # 日志按行显示，不换行可省去每次追加时的折行布局计算
+        self.log_text.setWordWrapMode(QTextOption.WrapMode.NoWrap)
+        self.log_text.setObjectName("logView")
         self.log_handler = LogHandler(self.log_text)
         
         log_buttons_layout = QHBoxLayout()
         self.clear_log_button = QPushButton("清除日志")
-        self.clear_log_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogResetButton))
+        self.clear_log_button.setIcon(icon(QStyle.StandardPixmap.SP_DialogResetButton))
         self.clear_log_button.clicked.connect(self.clear_log)
         self.export_log_button = QPushButton("导出日志")
-        self.export_log_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
+        self.export_log_button.setIcon(icon(QStyle.StandardPixmap.SP_DialogSaveButton))
         self.export_log_button.clicked.connect(self.export_log)
         log_buttons_layout.addWidget(self.clear_log_button)
         log_buttons_layout.addWidget(self.export_log_button)
@@ -534,7 +829,7 @@ class QRArrayApp(QMainWindow):
         
         # 添加缩放提示
         zoom_info = QLabel("提示: 使用鼠标滚轮缩放, 拖动图像平移")
-        zoom_info.setStyleSheet("color: #666; font-style: italic; font-size: 9pt;")
+        zoom_info.setObjectName("zoomHint")
         zoom_info.setAlignment(Qt.AlignmentFlag.AlignCenter)
         preview_layout.addWidget(zoom_info)
         
@@ -550,10 +845,15 @@ class QRArrayApp(QMainWindow):
         main_layout.addWidget(self.tabs, 1)
         main_layout.addWidget(bottom_area, 1)
         
+        # 缓存各数值框的当前值，开始生成时直接读取Python整数
+        for name in ('text_chunk_size', 'text_cols', 'text_rows',
+                     'file_chunk_size', 'file_cols', 'file_rows'):
+            self._track_spin_value(name)
+        
         # 初始化字符限制
         self.update_max_chars()
         
-        # 设置全局样式
+        # 设置全局样式（各控件通过对象名称选择样式，整个窗口只解析一次样式表）
         self.setStyleSheet("""
             QGroupBox {
                 font-weight: bold;
@@ -579,6 +879,28 @@ class QRArrayApp(QMainWindow):
             QSpinBox {
                 min-width: 80px;
             }
+            QLabel#hint, QLabel#zoomHint {
+                color: #666;
+                font-style: italic;
+            }
+            QLabel#zoomHint {
+                font-size: 9pt;
+            }
+            QLabel#dropLabel {
+                background-color: #f5f5f5;
+                border: 2px dashed #cccccc;
+                border-radius: 8px;
+                padding: 20px;
+                font-size: 14px;
+                color: #666666;
+            }
+            QPushButton#primaryAction {
+                font-weight: bold;
+                padding: 8px;
+            }
+            QPlainTextEdit#logView {
+                font-family: 'Consolas', 'Courier New', monospace;
+            }
         """)
         
         # 初始日志
@@ -586,6 +908,13 @@ class QRArrayApp(QMainWindow):
         self.log(f"版本: 1.5.1, 日期: 2025-05-30")
         self.log("提示: 可以直接将文件拖放到窗口中或使用Ctrl+V粘贴图像以快速解码")
     
+    def _track_spin_value(self, name):
+        """把数值框 self.<name> 的当前值同步保存到 self._<name>_v"""
+        spin = getattr(self, name)
+        attr = f"_{name}_v"
+        setattr(self, attr, spin.value())
+        spin.valueChanged.connect(lambda value: setattr(self, attr, value))
+    
     def update_max_chars(self):
         """更新字符数量限制，基于选定的QR码块大小"""
         chunk_size = self.text_chunk_size.value()
@@ -594,65 +923,90 @@ class QRArrayApp(QMainWindow):
         self.text_input.set_max_chars(max_chars)
         
         # 更新界面提示
-        text = self.text_input.toPlainText()
-        if len(text) > max_chars:
+        count = self.text_input.char_count()
+        if count > max_chars:
             QMessageBox.warning(
                 self, 
                 "字符限制已更改", 
-                f"当前文本 ({len(text)} 字符) 超出了新的字符限制 ({max_chars})。\n"
+                f"当前文本 ({count} 字符) 超出了新的字符限制 ({max_chars})。\n"
                 "请减少文本长度，否则生成QR码时可能会出错。"
             )
     
     # 浏览文件对话框
-    def browse_text_output(self):
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "保存QR码阵列", "", "PNG图像 (*.png);;所有文件 (*)"
-        )
-        if filename:
-            self.text_output_file.setText(filename)
+    def _dlg(self, mode, caption, filt="", directory="", select=""):
+        """显示文件对话框并返回选择的路径（取消时返回空字符串）
+
+        所有浏览操作共用同一个对话框实例，避免每次打开时重新创建对话框。
+        mode 为 "open"（选择已有文件）、"save"（保存文件）或 "dir"（选择目录）。
+        """
+        if self._fd is None:
+            self._fd = QFileDialog(self)
+        fd = self._fd
+        fd.setWindowTitle(caption)
+        if mode == "dir":
+            fd.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
+            fd.setFileMode(QFileDialog.FileMode.Directory)
+            fd.setOption(QFileDialog.Option.ShowDirsOnly, True)
+            fd.setNameFilter("")
+        else:
+            fd.setAcceptMode(QFileDialog.AcceptMode.AcceptSave if mode == "save" else QFileDialog.AcceptMode.AcceptOpen)
+            fd.setFileMode(QFileDialog.FileMode.AnyFile if mode == "save" else QFileDialog.FileMode.ExistingFile)
+            fd.setOption(QFileDialog.Option.ShowDirsOnly, False)
+            fd.setNameFilters(filt.split(";;") if filt else [])
+        if directory:
+            fd.setDirectory(directory)
+        # 清除上次对话框留下的选择；选择目录时默认选中当前目录
+        fd.selectFile(select or (fd.directory().absolutePath() if mode == "dir" else ""))
+        
+        if fd.exec() and fd.selectedFiles():
+            return fd.selectedFiles()[0]
+        return ""
+    
+    def _bind_browser(self, mode, line_edit, caption, filt=""):
+        """返回一个浏览按钮的槽函数：显示文件对话框，并把选择的路径填入 line_edit"""
+        def browse():
+            path = self._dlg(mode, caption, filt)
+            if path:
+                line_edit.setText(path)
+        return browse
     
     def browse_input_file(self):
-        filename, _ = QFileDialog.getOpenFileName(
-            self, "选择文件", "", "所有文件 (*)"
-        )
+        filename = self._dlg("open", "选择文件", "所有文件 (*)")
         if filename:
+            self._file_stat = None
             self.file_path.setText(filename)
     
-    def browse_file_output_dir(self):
-        dirname = QFileDialog.getExistingDirectory(
-            self, "选择输出目录", ""
-        )
-        if dirname:
-            self.file_output_dir.setText(dirname)
+    def _input_file_stat(self, file_path):
+        """返回输入文件的状态信息，每次选择文件后只调用一次os.stat，文件不存在时返回None"""
+        if self._file_stat is None or self._file_stat[0] != file_path:
+            try:
+                self._file_stat = (file_path, os.stat(file_path))
+            except OSError:
+                return None
+        return self._file_stat[1]
     
     def browse_input_image(self):
-        filename, _ = QFileDialog.getOpenFileName(
-            self, "选择QR码阵列图像", "", 
+        filename = self._dlg(
+            "open", "选择QR码阵列图像",
             "图像文件 (*.png *.jpg *.jpeg *.bmp *.webp *.tiff *.tif);;PNG图像 (*.png);;JPG图像 (*.jpg *.jpeg);;BMP图像 (*.bmp);;WebP图像 (*.webp);;TIFF图像 (*.tiff *.tif);;所有文件 (*)"
         )
         if filename:
+            self._pasted_image = None
             self.image_path.setText(filename)
             self.current_image_path = filename
-            self.show_image_preview(filename)
-    
-    def browse_decode_output_dir(self):
-        dirname = QFileDialog.getExistingDirectory(
-            self, "选择解码输出目录", ""
-        )
-        if dirname:
-            self.decode_output_dir.setText(dirname)
+            self.schedule_image_preview(filename)
     
     # 日志功能
     def log(self, message):
         self.log_handler.write(message)
     
     def clear_log(self):
-        self.log_text.clear()
-        self.log_handler.log_contents = []
+        self.log_handler.clear()
     
     def export_log(self):
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "导出日志", f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt", "文本文件 (*.txt);;所有文件 (*)"
+        filename = self._dlg(
+            "save", "导出日志", "文本文件 (*.txt);;所有文件 (*)",
+            select=f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         )
         if filename:
             if self.log_handler.export_log(filename):
@@ -661,31 +1015,62 @@ class QRArrayApp(QMainWindow):
                 QMessageBox.warning(self, "错误", "日志导出失败")
     
     # 图像预览
-    def show_image_preview(self, image_path):
+    def schedule_image_preview(self, image_path):
+        """在事件循环空闲时加载预览，让文件对话框或拖放操作先完成；
+        之后再次选择图像或开始解码时取消尚未执行的加载
+        """
+        self._preview_token += 1
+        token = self._preview_token
+        QTimer.singleShot(0, lambda: token == self._preview_token and self.show_image_preview(image_path))
+    
+    def show_image_preview(self, image_path, preview=None):
+        # 同一文件未被修改时保持当前预览，避免重复加载和重排
+        try:
+            st = os.stat(image_path)
+            preview_key = (image_path, st.st_mtime_ns, st.st_size)
+        except OSError:
+            preview_key = None
+        if preview_key is not None and preview_key == self._last_preview_key:
+            return
+        self._last_preview_key = None
+        
+        # 批量修改查看器内容，只在最后重绘一次
+        self.image_viewer.setUpdatesEnabled(False)
         try:
             # 使用可缩放图像查看器加载图像
-            if self.image_viewer.load_image(image_path):
-                self.log(f"加载预览图像: {image_path}")
+            if self.image_viewer.load_image(image_path, preview):
+                self._last_preview_key = preview_key
+                self.current_image_size = self.image_viewer.image_size
+                self.log(f"加载预览图像: {image_path} "
+                         f"({self.current_image_size.width()}x{self.current_image_size.height()})")
             else:
-                self.image_viewer.scene.clear()
+                self.image_viewer.clear_image()
                 self.log(f"无法加载图像: {image_path}")
         except Exception as e:
             self.log(f"预览图像时出错: {str(e)}")
-            self.image_viewer.scene.clear()
+            self.image_viewer.clear_image()
+        finally:
+            self.image_viewer.setUpdatesEnabled(True)
     
     # 数据验证
     def validate_text_input(self):
         """验证文本输入是否有效，并检查字符数量"""
-        text = self.text_input.toPlainText()
-        if not text:
+        count = self.text_input.char_count()
+        if not count:
             QMessageBox.warning(self, "警告", "请输入要编码的文本")
             return False
         
         max_chars = self.text_input.max_chars
-        if len(text) > max_chars:
+        if self.text_input.estimated_qr_version() is None:
+            QMessageBox.warning(
+                self, "警告",
+                "最大的文本块超出单个QR码的最大容量，请减小每个QR码字符数。"
+            )
+            return False
+        if count > max_chars:
             result = QMessageBox.question(
                 self, "文本块大小",
-                f"输入文本字符数 ({len(text)}) 超过了当前设置的每个QR码字符数 ({max_chars})。\n\n"
+                f"输入文本字符数 ({count}) 超过了当前设置的每个QR码字符数 ({max_chars})。\n\n"
                 "系统将自动分割文本成多个QR码。较大的QR码能更有效传输数据，但需要确保您有\n"
                 "高质量的扫描设备进行解码。\n\n"
                 "是否继续生成QR码阵列？",
@@ -697,31 +1082,69 @@ class QRArrayApp(QMainWindow):
         return True
     
     # 工作线程操作
-    def start_worker(self, function, args=None, kwargs=None):
-        # 显示进度条
+    def _check_backend(self):
+        """检查后端是否可用（不等待导入完成），导入失败时提示用户并返回False"""
+        error = backend_error()
+        if error is None:
+            return True
+        self.log(f"QR码处理功能不可用: {type(error).__name__}: {error}")
+        QMessageBox.critical(
+            self, "错误",
+            "无法加载QR码处理功能，请确认依赖已正确安装"
+            "（qrcode、pillow、opencv-python、pyzbar及zbar库、numpy）。\n\n"
+            f"错误信息: {error}"
+        )
+        return False
+    
+    def start_worker(self, function, args=None, kwargs=None, postprocess=None):
+        # 显示进度条（窗口最小化时暂不启动忙碌动画）
+        if not self.isMinimized():
+            self.progress_bar.setRange(0, 0)
         self.progress_bar.show()
         
-        # 创建并启动工作线程
-        worker = WorkerThread(function, args, kwargs)
-        worker.finished.connect(self.on_worker_finished)
-        worker.error.connect(self.on_worker_error)
-        worker.start()
+        # 提交到共享线程池，线程在多次操作之间复用
+        job = WorkerRunnable(function, args, kwargs, postprocess)
+        job.signals.finished.connect(self.on_worker_finished)
+        job.signals.error.connect(self.on_worker_error)
+        # 结束后移除引用，避免长时间使用时不断累积
+        job.signals.finished.connect(lambda *_: self._release_job(job))
+        job.signals.error.connect(lambda *_: self._release_job(job))
+        
+        # 保存任务引用，保证信号对象在结果送达界面线程前不被回收
+        self._active_jobs.add(job)
+        self.pool.start(job)
+    
+    def _preview_postprocess(self):
+        """返回在工作线程中为生成结果解码预览图像的后处理函数"""
+        bound = self.image_viewer.preview_bound()
+        
+        def postprocess(result):
+            if not (isinstance(result, tuple) and len(result) == 2 and result[0]):
+                return result
+            array_file, num_chunks = result
+            return array_file, num_chunks, read_preview_image(array_file, bound)
         
-        # 保存工作线程引用以避免被垃圾回收
-        self.workers.append(worker)
+        return postprocess
+    
+    def _release_job(self, job):
+        """释放已完成的后台任务"""
+        if job in self._active_jobs:
+            self._active_jobs.discard(job)
+            job.signals.deleteLater()
     
     def on_worker_finished(self, result):
         # 隐藏进度条
         self.progress_bar.hide()
         
         # 处理结果
-        if isinstance(result, tuple) and len(result) == 2:
-            # 生成QR码阵列的结果
-            array_file, num_chunks = result
+        if isinstance(result, tuple) and len(result) in (2, 3):
+            # 生成QR码阵列的结果（可能附带工作线程中解码好的预览图像）
+            array_file, num_chunks = result[:2]
+            preview = result[2] if len(result) == 3 else None
             self.log(f"操作完成: 生成了 {num_chunks} 个QR码")
             self.log(f"QR码阵列保存在: {array_file}")
             self.current_image_path = array_file
-            self.show_image_preview(array_file)
+            self.show_image_preview(array_file, preview)
             
             # 显示成功消息
             QMessageBox.information(
@@ -732,6 +1155,12 @@ class QRArrayApp(QMainWindow):
             )
         else:
             # 解码QR码阵列的结果
+            debug_source, self._debug_source = self._debug_source, None
+            debug_image = debug_image_path(debug_source[0]) if debug_source and debug_image_path else None
+            if debug_image and os.path.exists(debug_image):
+                self.log(f"可视化调试结果: {debug_image}")
+                self.show_image_preview(debug_image)
+            
             if result:
                 self.log(f"操作完成: 文件已解码并保存为 {result}")
                 
@@ -754,23 +1183,32 @@ class QRArrayApp(QMainWindow):
                 )
 
                 if reply == QMessageBox.StandardButton.Open:
-                    try:
-                        os.startfile(result) # Windows specific command
-                        self.log(f"已尝试打开文件: {result}")
-                    except Exception as e:
-                        self.log(f"无法打开文件: {str(e)}")
-                        QMessageBox.warning(self, "打开失败", f"无法自动打开文件: {result}\n错误: {str(e)}")
+                    self.open_file_async(result)
                 
                 # 如果是文本文件，尝试在日志区域显示内容预览
                 if filename.endswith('.txt'):
                     try:
-                        with open(result, 'r', encoding='utf-8') as f:
-                            content = f.read(500)  # 读取前500个字符
+                        # 只读取文件开头固定字节数，与文件大小无关；
+                        # 直接使用文件描述符，一次系统调用，不创建缓冲读取对象
+                        fd = os.open(result, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                        try:
+                            raw = os.read(fd, PREVIEW_READ_BYTES)
+                        finally:
+                            os.close(fd)
                         
-                        self.log("解码内容预览:")
-                        self.log("------------")
-                        self.log(content + ("..." if len(content) >= 500 else ""))
-                        self.log("------------")
+                        head = raw[:512]
+                        if head and head.count(0) / len(head) > 0.1:
+                            self.log("解码内容为二进制数据，跳过预览")
+                        else:
+                            # 增量解码器会丢弃末尾被截断的不完整字符
+                            text = codecs.getincrementaldecoder('utf-8')(errors='replace').decode(raw)
+                            content = text[:PREVIEW_MAX_CHARS]
+                            truncated = len(text) > PREVIEW_MAX_CHARS or len(raw) == PREVIEW_READ_BYTES
+                            
+                            self.log("解码内容预览:")
+                            self.log("------------")
+                            self.log(content + ("..." if truncated else ""))
+                            self.log("------------")
                     except Exception as e:
                         self.log(f"无法预览文件内容: {str(e)}")
             else:
@@ -784,6 +1222,26 @@ class QRArrayApp(QMainWindow):
                     "请查看操作日志获取详细错误信息。"
                 )
     
+    def open_file_async(self, path):
+        """在线程池中用关联程序打开文件，避免等待系统启动程序时界面卡住"""
+        def open_file():
+            os.startfile(path)  # Windows specific command
+        
+        def on_opened(_):
+            self.log(f"已尝试打开文件: {path}")
+        
+        def on_failed(error_msg):
+            self.log(f"无法打开文件: {error_msg}")
+            QMessageBox.warning(self, "打开失败", f"无法自动打开文件: {path}\n错误: {error_msg}")
+        
+        job = WorkerRunnable(open_file)
+        job.signals.finished.connect(on_opened)
+        job.signals.error.connect(on_failed)
+        job.signals.finished.connect(lambda *_: self._release_job(job))
+        job.signals.error.connect(lambda *_: self._release_job(job))
+        self._active_jobs.add(job)
+        self.pool.start(job)
+    
     def on_worker_error(self, error_msg):
         # 隐藏进度条
         self.progress_bar.hide()
@@ -818,38 +1276,45 @@ class QRArrayApp(QMainWindow):
         
         # 获取文本和选项
         text = self.text_input.toPlainText()
-        chunk_size = self.text_chunk_size.value()
-        cols = self.text_cols.value()
-        rows = None if self.text_rows.value() == 0 else self.text_rows.value()
+        chunk_size = self._text_chunk_size_v
+        cols = self._text_cols_v
+        rows = self._text_rows_v or None
         output_file = self.text_output_file.text()
         
         # 记录操作
-        self.log(f"开始生成文本QR码阵列")
-        self.log(f"文本长度: {len(text)} 字符")
-        self.log(f"每个QR码字符数: {chunk_size}")
-        self.log(f"列数: {cols}, 行数: {'自动' if rows is None else rows}")
+        self.log("\n".join([
+            "开始生成文本QR码阵列",
+            f"文本长度: {len(text)} 字符",
+            f"每个QR码字符数: {chunk_size}",
+            f"列数: {cols}, 行数: {'自动' if rows is None else rows}",
+        ]))
         
         # 在工作线程中执行
+        if not self._check_backend():
+            return
         self.start_worker(
-            create_qr_array,
-            args=[text],
+            run_backend,
+            args=['create_qr_array', text],
             kwargs={
                 'chunk_size': chunk_size,
                 'rows': rows,
                 'cols': cols,
-                'output_file': output_file
-            }
+                'output_file': output_file,
+                'use_array_cache': self.text_use_cache.isChecked()
+            },
+            postprocess=self._preview_postprocess()
         )
     
     def generate_file_qr_array(self):
         # 获取文件路径和选项
         file_path = self.file_path.text()
-        if not file_path or not os.path.exists(file_path):
+        st = self._input_file_stat(file_path) if file_path else None
+        if st is None or not stat.S_ISREG(st.st_mode):
             QMessageBox.warning(self, "警告", "请选择有效的输入文件")
             return
         
         # 检查文件大小
-        file_size = os.path.getsize(file_path)
+        file_size = st.st_size
         if file_size > 1024 * 1024:  # 1MB
             result = QMessageBox.question(
                 self, "文件较大",
@@ -862,9 +1327,9 @@ class QRArrayApp(QMainWindow):
             if result != QMessageBox.StandardButton.Yes:
                 return
         
-        chunk_size = self.file_chunk_size.value()
-        cols = self.file_cols.value()
-        rows = None if self.file_rows.value() == 0 else self.file_rows.value()
+        chunk_size = self._file_chunk_size_v
+        cols = self._file_cols_v
+        rows = self._file_rows_v or None
         output_dir = self.file_output_dir.text()
         
         # 确保输出目录存在
@@ -875,50 +1340,80 @@ class QRArrayApp(QMainWindow):
         output_file = os.path.join(output_dir, f"{os.path.splitext(base_name)[0]}_qr_array.png")
         
         # 记录操作
-        self.log(f"开始生成文件QR码阵列")
-        self.log(f"文件路径: {file_path}")
-        self.log(f"文件大小: {file_size / 1024:.1f} KB")
-        self.log(f"每个QR码字符数: {chunk_size}")
-        self.log(f"列数: {cols}, 行数: {'自动' if rows is None else rows}")
+        self.log("\n".join([
+            "开始生成文件QR码阵列",
+            f"文件路径: {file_path}",
+            f"文件大小: {file_size / 1024:.1f} KB",
+            f"每个QR码字符数: {chunk_size}",
+            f"列数: {cols}, 行数: {'自动' if rows is None else rows}",
+        ]))
         
         # 在工作线程中执行
+        if not self._check_backend():
+            return
         self.start_worker(
-            encode_file_to_qr_array,
-            args=[file_path],
+            run_backend,
+            args=['encode_file_to_qr_array', file_path],
             kwargs={
                 'chunk_size': chunk_size,
                 'rows': rows,
                 'cols': cols,
-                'output_file': output_file
-            }
+                'output_file': output_file,
+                'use_array_cache': self.file_use_cache.isChecked()
+            },
+            postprocess=self._preview_postprocess()
         )
     
     def decode_qr_array(self):
         # 获取图像路径和选项
         image_path = self.image_path.text()
-        if not image_path or not os.path.exists(image_path):
+        if self._pasted_image is not None:
+            # 粘贴的图像直接以内存中的数组解码
+            image_source = self._pasted_image
+        elif not image_path or not os.path.exists(image_path):
             QMessageBox.warning(self, "警告", "请选择有效的QR码阵列图像")
             return
+        else:
+            image_source = image_path
         
         output_dir = self.decode_output_dir.text()
         visual_debug = self.visual_debug.isChecked()
+        # 取消尚未执行的预览加载，解码优先
+        self._preview_token += 1
         
         # 记录操作
-        self.log(f"开始解码QR码阵列")
-        self.log(f"图像路径: {image_path}")
-        self.log(f"输出目录: {output_dir}")
-        self.log(f"可视化调试: {'是' if visual_debug else '否'}")
+        self.log("\n".join([
+            "开始解码QR码阵列",
+            f"图像路径: {image_path}",
+            f"输出目录: {output_dir}",
+            f"可视化调试: {'是' if visual_debug else '否'}",
+        ]))
         
         # 在工作线程中执行
+        if not self._check_backend():
+            return
+        # 可视化调试结果由解码函数保存为图像，解码完成后在预览区显示
+        self._debug_source = (image_source,) if visual_debug else None
         self.start_worker(
-            decode_qr_array_to_file,
-            args=[image_path],
+            run_backend,
+            args=['decode_qr_array_to_file', image_source],
             kwargs={
                 'output_dir': output_dir,
                 'visual_debug': visual_debug
             }
         )
 
+    def changeEvent(self, event):
+        """窗口最小化时暂停进度条的忙碌动画，恢复后继续"""
+        if event.type() == QEvent.Type.WindowStateChange:
+            if self.isMinimized():
+                # 不确定进度的动画会持续重绘，最小化时切换为静止的普通范围
+                self.progress_bar.setRange(0, 1)
+                self.progress_bar.setValue(0)
+            elif self._active_jobs:
+                self.progress_bar.setRange(0, 0)
+        super().changeEvent(event)
+    
     def dragEnterEvent(self, event: QDragEnterEvent):
         """处理拖入开始事件"""
         if event.mimeData().hasUrls():
@@ -951,6 +1446,7 @@ class QRArrayApp(QMainWindow):
                 
                 elif current_tab == 1:  # 文件编码选项卡
                     # 设置文件路径
+                    self._file_stat = None
                     self.file_path.setText(file_path)
                     self.log(f"已选择文件: {file_path}")
                 
@@ -958,27 +1454,30 @@ class QRArrayApp(QMainWindow):
                     # 检查是否为图像文件
                     ext = os.path.splitext(file_path)[1].lower()
                     if ext in ['.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tiff', '.tif']:
+                        self._pasted_image = None
                         self.image_path.setText(file_path)
                         self.current_image_path = file_path
-                        self.show_image_preview(file_path)
+                        self.schedule_image_preview(file_path)
                         self.log(f"已加载图像: {file_path}")
                     else:
                         QMessageBox.warning(self, "警告", "请拖入支持的图像文件格式")
 
-    def handle_pasted_image(self, image_path):
+    def handle_pasted_image(self, image_array, image):
         """处理从剪贴板粘贴的图像"""
-        if os.path.exists(image_path):
-            self.image_path.setText(image_path)
-            self.current_image_path = image_path
-            self.show_image_preview(image_path)
-            self.log(f"已从剪贴板粘贴图像: {image_path}")
-            
-            # 如果是临时图像，提示用户
-            if tempfile.gettempdir() in image_path:
-                self.log("注意: 这是一个临时文件，应用程序关闭后可能会被删除")
+        self._pasted_image = image_array
+        self._preview_token += 1
+        self._last_preview_key = None
+        label = f"{PASTED_IMAGE_LABEL} ({image.width()}x{image.height()})"
+        self.image_path.setText(label)
+        self.current_image_path = None
+        self.image_viewer.load_qimage(image)
+        self.log(f"已从剪贴板粘贴图像: {image.width()}x{image.height()}")
 
 # 主函数
 def main():
+    # 创建窗口的同时在后台导入较慢的依赖
+    start_backend_prewarm()
+    
     app = QApplication(sys.argv)
     
     # 设置应用样式
@@ -1,63 +1,163 @@
 import base64
+import codecs
+import io
+import logging
+import mmap
 import os
 import argparse
 import re
-from generate_qr_array import create_qr_array
-from read_qr_array import read_qr_array
+from generate_qr_array import create_qr_array, create_qr_array_streaming, PNG_COMPRESS_LEVEL, DEFAULT_CACHE_DIR
+from read_qr_array import read_qr_array, show_debug_image
 
-def encode_file_to_qr_array(file_path, chunk_size=1000, rows=None, cols=None, output_file=None):
-    """将文件编码为QR码阵列"""
-    # 检查文件是否为文本文件
-    is_text = False
+# 可选的pybase64编解码后端，安装后优先使用（SIMD实现，编解码速度约为标准库的5~10倍），
+# 未安装时回退到标准库base64，两者输出完全一致
+try:
+    import pybase64
+    b64encode, b64decode = pybase64.b64encode, pybase64.b64decode
+except ImportError:
+    pybase64 = None
+    b64encode, b64decode = base64.b64encode, base64.b64decode
+
+# 流式Base64编码时每次读取的原始字节数（3的倍数，保证分块编码结果与整体编码一致）
+BASE64_READ_BLOCK_SIZE = 3 * 64 * 1024
+# 读取待编码文件时的缓冲区大小
+FILE_READ_BUFFER_SIZE = 1024 * 1024
+# 判断是否为文本文件时嗅探的文件开头字节数
+TEXT_SNIFF_BYTES = 8 * 1024
+# 写入解码文件时的缓冲区大小，以及每次解码、写入的字符数（4的倍数）
+FILE_WRITE_BUFFER_SIZE = 1024 * 1024
+DECODE_WRITE_BLOCK_SIZE = 4 * 64 * 1024
+
+# 合并数据开头可能残留的索引前缀（新格式 "IDX:000:" 与旧格式 "0:"）
+_IDX_PREFIX_NEW = re.compile(r'IDX:\d{3}:(QRTEXT:|QRFILE:)')
+_IDX_PREFIX_OLD = re.compile(r'\d+:(QRTEXT:|QRFILE:)')
+# Base64字母表以外的字符（换行、空格等），分块解码前需先去除
+_BASE64_INVALID = re.compile(r'[^A-Za-z0-9+/=]')
+
+class Base64StreamReader:
+    """边读取边Base64编码的只读字节流，可选的头部标识作为前缀输出"""
+    
+    def __init__(self, fp, prefix=b''):
+        self._fp = fp
+        self._buffer = bytearray(prefix)
+        self._eof = False
+    
+    def read(self, size=-1):
+        # 补充缓冲区，直到满足请求的长度或原文件读完
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            block = self._fp.read(BASE64_READ_BLOCK_SIZE)
+            if not block:
+                self._eof = True
+                break
+            self._buffer += b64encode(block)
+        
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+    
+    def close(self):
+        self._fp.close()
+
+def _looks_like_utf8(head):
+    """判断文件开头的字节是否为合法的UTF-8（允许末尾被截断的多字节字符）"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text_content = f.read()
-            is_text = True
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+        return True
     except UnicodeDecodeError:
-        is_text = False
-    
+        return False
+
+def encode_file_to_qr_array(file_path, chunk_size=1000, rows=None, cols=None, output_file=None,
+                            png_level=PNG_COMPRESS_LEVEL, cache_dir=None):
+    """将文件编码为QR码阵列（png_level为输出PNG的压缩级别，0-9；
+    cache_dir为阵列缓存目录，默认不缓存，流式编码的二进制文件不使用缓存）"""
     # 获取文件名和扩展名
     file_name = os.path.basename(file_path)
     
-    if is_text:
-        # 对于文本文件，直接使用文本内容
-        with open(file_path, 'r', encoding='utf-8') as f:
-            file_content = f.read()
-        # 标记为文本文件
-        header = f"QRTEXT:{file_name}:"
-        full_data = header + file_content
-    else:
-        # 对于二进制文件，使用Base64编码
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
-        # Base64编码
-        encoded_data = base64.b64encode(file_data).decode('utf-8')
-        # 标记为二进制文件
-        header = f"QRFILE:{file_name}:"
-        full_data = header + encoded_data
-    
-    # 如果未指定输出文件名，则使用原文件名+后缀
-    if output_file is None:
-        output_file = f"{os.path.splitext(file_name)[0]}_qr_array.png"
-    
-    # 创建QR码阵列
-    print(f"文件类型: {'文本' if is_text else '二进制'}")
-    print(f"文件大小: {len(full_data) - len(header)} 字符/字节")
-    print(f"编码后数据大小: {len(full_data)} 字符")
-    print(f"头部标识: {header}")
-    
-    array_file, num_chunks = create_qr_array(
-        text=full_data,
-        chunk_size=chunk_size,
-        rows=rows,
-        cols=cols,
-        output_file=output_file
-    )
+    # 只打开一次文件：先嗅探开头的字节，像UTF-8时才整体按文本读取，
+    # 否则（或读取中途解码失败）回到文件开头按二进制处理，避免整个文件被读取两次
+    f = open(file_path, 'rb', buffering=FILE_READ_BUFFER_SIZE)
+    try:
+        is_text = False
+        head = f.read(TEXT_SNIFF_BYTES)
+        f.seek(0)
+        if _looks_like_utf8(head):
+            text_reader = io.TextIOWrapper(f, encoding='utf-8')
+            try:
+                file_content = text_reader.read()
+                is_text = True
+            except UnicodeDecodeError:
+                f.seek(0)
+            finally:
+                text_reader.detach()
+        
+        if is_text:
+            # 对于文本文件，直接使用文本内容
+            # 标记为文本文件
+            header = f"QRTEXT:{file_name}:"
+            full_data = header + file_content
+            data_size = len(full_data)
+        else:
+            # 对于二进制文件，使用Base64编码
+            # 标记为二进制文件
+            header = f"QRFILE:{file_name}:"
+            # Base64编码后的长度
+            encoded_size = 4 * ((os.fstat(f.fileno()).st_size + 2) // 3)
+            data_size = len(header) + encoded_size
+            if header.isascii():
+                # 纯ASCII数据边读取边编码，流式生成QR码，不在内存中拼接完整载荷
+                full_data = None
+            else:
+                # 文件名含非ASCII字符时按字符分割，避免多字节字符被拆到两个QR码中
+                # 通过内存映射直接编码页缓存中的文件内容，不额外复制一份原始文件数据
+                # （mmap不支持映射空文件，空文件直接得到空载荷）
+                if os.fstat(f.fileno()).st_size == 0:
+                    encoded = b''
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        encoded = b64encode(mm)
+                full_data = header + encoded.decode('ascii')
+        
+        # 如果未指定输出文件名，则使用原文件名+后缀
+        if output_file is None:
+            output_file = f"{os.path.splitext(file_name)[0]}_qr_array.png"
+        
+        # 创建QR码阵列
+        print(f"文件类型: {'文本' if is_text else '二进制'}")
+        print(f"文件大小: {data_size - len(header)} 字符/字节")
+        print(f"编码后数据大小: {data_size} 字符")
+        print(f"头部标识: {header}")
+        
+        if full_data is None:
+            reader = Base64StreamReader(f, prefix=header.encode('ascii'))
+            array_file, num_chunks = create_qr_array_streaming(
+                reader,
+                chunk_size=chunk_size,
+                rows=rows,
+                cols=cols,
+                output_file=output_file,
+                png_level=png_level
+            )
+        else:
+            array_file, num_chunks = create_qr_array(
+                text=full_data,
+                chunk_size=chunk_size,
+                rows=rows,
+                cols=cols,
+                output_file=output_file,
+                cache_dir=cache_dir,
+                png_level=png_level
+            )
+    finally:
+        f.close()
     
     return array_file, num_chunks
 
 def decode_qr_array_to_file(array_image_path, output_dir='.', visual_debug=False):
-    """从QR码阵列解码文件"""
+    """从QR码阵列解码文件（array_image_path 也可以是内存中的图像数组）"""
     # 读取QR码阵列
     combined_text = read_qr_array(array_image_path, visual_debug)
     
@@ -69,8 +169,8 @@ def decode_qr_array_to_file(array_image_path, output_dir='.', visual_debug=False
     
     # 处理可能带有索引前缀的数据
     # 检查是否有形如 "IDX:000:QRTEXT:" 或 "0:QRTEXT:" 前缀
-    match_new = re.match(r'^IDX:\d{3}:(QRTEXT:|QRFILE:)', combined_text)
-    match_old = re.match(r'^\d+:(QRTEXT:|QRFILE:)', combined_text)
+    match_new = _IDX_PREFIX_NEW.match(combined_text)
+    match_old = _IDX_PREFIX_OLD.match(combined_text)
     
     if match_new:
         # 去除新格式的索引前缀 IDX:000:
@@ -145,18 +245,28 @@ def decode_qr_array_to_file(array_image_path, output_dir='.', visual_debug=False
         
         if is_text:
             # 对于文本文件，使用UTF-8-SIG编码写入，以正确处理中文字符
-            with open(output_path, 'w', encoding='utf-8-sig') as f:
-                f.write(file_content)
+            # 分块写入，避免编码器一次生成整个文件的字节副本
+            with open(output_path, 'w', encoding='utf-8-sig', buffering=FILE_WRITE_BUFFER_SIZE) as f:
+                for i in range(0, len(file_content), DECODE_WRITE_BLOCK_SIZE):
+                    f.write(file_content[i:i + DECODE_WRITE_BLOCK_SIZE])
             print(f"已写入文本文件，内容前50个字符: {file_content[:50]}...")
         else:
-            # 对于二进制文件，解码Base64数据
+            # 对于二进制文件，分块解码Base64数据并边解码边写入，
+            # 不在内存中保留完整的解码结果（块大小为4的倍数，分块解码与整体解码结果一致）
             try:
-                file_data = base64.b64decode(file_content)
-                with open(output_path, 'wb') as f:
-                    f.write(file_data)
-                print(f"已写入二进制文件，大小: {len(file_data)} 字节")
+                # 整体解码时会忽略换行等非Base64字符，分块解码时这些字符会打乱4字符对齐，先统一去除
+                if _BASE64_INVALID.search(file_content):
+                    file_content = _BASE64_INVALID.sub('', file_content)
+                written = 0
+                with open(output_path, 'wb', buffering=FILE_WRITE_BUFFER_SIZE) as f:
+                    for i in range(0, len(file_content), DECODE_WRITE_BLOCK_SIZE):
+                        written += f.write(b64decode(file_content[i:i + DECODE_WRITE_BLOCK_SIZE]))
+                print(f"已写入二进制文件，大小: {written} 字节")
             except Exception as e:
                 print(f"Base64解码错误: {e}")
+                # 删除解码中途失败时留下的不完整文件
+                if os.path.exists(output_path):
+                    os.remove(output_path)
                 return None
         
         print(f"文件已成功解码并保存为: {output_path}")
@@ -170,6 +280,7 @@ def decode_qr_array_to_file(array_image_path, output_dir='.', visual_debug=False
 
 def main():
     parser = argparse.ArgumentParser(description='通过QR码阵列传输文件')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出每个QR码的详细识别信息')
     subparsers = parser.add_subparsers(dest='command', help='command')
     
     # 编码命令
@@ -179,6 +290,10 @@ def main():
     encode_parser.add_argument('--rows', type=int, help='QR码阵列的行数 (默认: 自动计算)')
     encode_parser.add_argument('--cols', type=int, help='QR码阵列的列数 (默认: 自动计算)')
     encode_parser.add_argument('--output', help='输出文件名 (默认: 使用原文件名)')
+    encode_parser.add_argument('--png-level', type=int, choices=range(10), metavar='0-9', default=PNG_COMPRESS_LEVEL,
+                               help=f'输出PNG的压缩级别，越低越快、越高文件越小 (默认: {PNG_COMPRESS_LEVEL})')
+    encode_parser.add_argument('--cache', action='store_true',
+                               help=f'缓存生成的阵列，相同输入再次编码时直接复用 (缓存目录: {DEFAULT_CACHE_DIR})')
     
     # 解码命令
     decode_parser = subparsers.add_parser('decode', help='从QR码阵列解码文件')
@@ -188,13 +303,19 @@ def main():
     
     args = parser.parse_args()
     
+    # 详细信息以DEBUG级别日志输出，--verbose 或可视化调试时启用
+    verbose = args.verbose or getattr(args, 'debug', False)
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.WARNING, format='%(message)s')
+    
     if args.command == 'encode':
         encode_file_to_qr_array(
             args.file,
             chunk_size=args.chunk_size,
             rows=args.rows,
             cols=args.cols,
-            output_file=args.output
+            output_file=args.output,
+            png_level=args.png_level,
+            cache_dir=DEFAULT_CACHE_DIR if args.cache else None
         )
     
     elif args.command == 'decode':
@@ -203,6 +324,8 @@ def main():
             output_dir=args.output_dir,
             visual_debug=args.debug
         )
+        if args.debug:
+            show_debug_image(args.image)
     
     else:
         parser.print_help()
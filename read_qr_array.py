@@ -1,9 +1,253 @@
 import cv2
+import logging
 import numpy as np
 from pyzbar.pyzbar import decode
 from PIL import Image
 import re
 import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# 逐个QR码的详细信息通过DEBUG级别日志输出，默认不输出，避免大阵列时大量的字符串拼接和打印
+logger = logging.getLogger(__name__)
+
+# 识别结果缓存的最大条目数（重复识别同一图像时跳过QR码解码）
+DECODE_CACHE_SIZE = 32
+
+# 数据块索引前缀不在开头时使用的宽松搜索模式
+_IDX_SEARCH_PATTERN = re.compile(r'IDX:(\d{3}):(.*)', re.DOTALL)
+# 可视化调试时标注QR码索引号使用的模式
+_IDX_LABEL_PATTERN = re.compile(r'IDX:(\d{3}):')
+
+# 分块并行解码：低分辨率预扫描的缩放比例、相邻分块的重叠像素，
+# 以及预扫描识别到的QR码不超过该数量时直接整图解码
+TILE_PROBE_SCALE = 0.5
+TILE_OVERLAP = 32
+TILE_MIN_CODES = 4
+# 分块的最小边长（像素，约为一个常见QR码连同静区和间距的尺寸）；
+# 图像两个方向都不足两个分块时跳过预扫描直接整图解码，小阵列不必多解码一遍
+TILE_MIN_SIDE = 600
+
+# 批量解码QR码数据时使用的分隔符（Base64与索引格式中都不会出现）
+PAYLOAD_SEPARATOR = b'\x1f'
+
+# pyzbar识别结果中间缺少数据块时，QR码总数不超过该值才用OpenCV补充识别
+OPENCV_FALLBACK_MAX_CODES = 8
+
+# OpenCV识别结果使用与pyzbar相同的字段，后续的可视化和结果解析无需区分来源
+CvDecoded = namedtuple('CvDecoded', 'data type rect polygon')
+CvPoint = namedtuple('CvPoint', 'x y')
+CvRect = namedtuple('CvRect', 'left top width height')
+
+_decode_cache = OrderedDict()
+_decode_cache_lock = threading.Lock()
+
+def _image_cache_key(image):
+    """计算内存中图像数组的缓存键（内容的BLAKE2摘要及尺寸、数据类型）"""
+    digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16).digest()
+    return digest, image.shape, image.dtype.str
+
+def _get_cached_results(cache_key):
+    """取出缓存的识别结果，未命中时返回None"""
+    with _decode_cache_lock:
+        results = _decode_cache.get(cache_key)
+        if results is not None:
+            _decode_cache.move_to_end(cache_key)
+            return list(results)
+    return None
+
+def _store_cached_results(cache_key, results):
+    """缓存识别结果，超出容量时淘汰最久未使用的条目"""
+    with _decode_cache_lock:
+        _decode_cache[cache_key] = tuple(results)
+        _decode_cache.move_to_end(cache_key)
+        while len(_decode_cache) > DECODE_CACHE_SIZE:
+            _decode_cache.popitem(last=False)
+
+def _polygon_centre(obj):
+    """QR码多边形的中心点"""
+    points = obj.polygon
+    return (sum(p.x for p in points) / len(points), sum(p.y for p in points) / len(points))
+
+def _translate_decoded(obj, dx, dy):
+    """将分块内识别结果的坐标平移回整幅图像的坐标"""
+    polygon = [type(p)(p.x + dx, p.y + dy) for p in obj.polygon]
+    rect = obj.rect
+    if rect is not None:
+        rect = rect._replace(left=rect.left + dx, top=rect.top + dy)
+    return obj._replace(rect=rect, polygon=polygon)
+
+def _axis_tiles(centres, code_size, length, overlap):
+    """根据一个方向上QR码中心的分布推算网格间距，返回该方向各分块的起止坐标"""
+    # 中心相距不足半个QR码的归为同一行（列）
+    groups = []
+    for c in sorted(centres):
+        if groups and c - groups[-1][-1] <= code_size / 2:
+            groups[-1].append(c)
+        else:
+            groups.append([c])
+    means = [sum(g) / len(g) for g in groups]
+    if len(means) == 1:
+        return [(0, length)]
+    
+    # 预扫描可能漏掉整行（列），以最小间距作为网格步长补齐中间的行（列）
+    pitch = min(b - a for a, b in zip(means, means[1:]))
+    count = int(round((means[-1] - means[0]) / pitch)) + 1
+    if count > 4 * len(means):
+        return None
+    
+    tiles = []
+    for k in range(count):
+        c = means[0] + k * pitch
+        start = 0 if k == 0 else max(0, int(c - pitch / 2 - overlap))
+        end = length if k == count - 1 else min(length, int(c + pitch / 2 + overlap))
+        tiles.append((start, end))
+    return tiles
+
+def decode_tiled(gray, rows=None, cols=None, overlap=TILE_OVERLAP):
+    """将QR码阵列图像切分为分块，用多个线程并行解码
+
+    rows/cols 未指定时，先在缩小的图像上快速识别一遍，根据QR码的位置推算网格；
+    图像太小无法分块、识别到的QR码较少或无法推算网格时退回整图解码。pyzbar解码时会释放GIL，线程可以并行。
+    """
+    height, width = gray.shape[:2]
+    probe_count = 0
+    if rows and cols:
+        row_tiles = [(max(0, height * r // rows - overlap), min(height, height * (r + 1) // rows + overlap))
+                     for r in range(rows)]
+        col_tiles = [(max(0, width * c // cols - overlap), min(width, width * (c + 1) // cols + overlap))
+                     for c in range(cols)]
+        code_size = min(height / rows, width / cols)
+    elif height < 2 * TILE_MIN_SIDE and width < 2 * TILE_MIN_SIDE:
+        return decode(gray)
+    else:
+        small = cv2.resize(gray, None, fx=TILE_PROBE_SCALE, fy=TILE_PROBE_SCALE, interpolation=cv2.INTER_AREA)
+        probe = decode(small)
+        probe_count = len(probe)
+        if probe_count <= TILE_MIN_CODES:
+            return decode(gray)
+        
+        centres = [_polygon_centre(obj) for obj in probe]
+        sizes = sorted(max(p.x for p in obj.polygon) - min(p.x for p in obj.polygon) for obj in probe)
+        code_size = sizes[len(sizes) // 2] / TILE_PROBE_SCALE
+        centres = [(x / TILE_PROBE_SCALE, y / TILE_PROBE_SCALE) for x, y in centres]
+        row_tiles = _axis_tiles([y for _, y in centres], code_size, height, overlap)
+        col_tiles = _axis_tiles([x for x, _ in centres], code_size, width, overlap)
+        if row_tiles is None or col_tiles is None:
+            return decode(gray)
+    
+    tiles = [(y0, y1, x0, x1) for y0, y1 in row_tiles for x0, x1 in col_tiles]
+    if len(tiles) == 1:
+        return decode(gray)
+    
+    print(f"分块并行解码: {len(row_tiles)}x{len(col_tiles)} 个分块")
+    with ThreadPoolExecutor(max_workers=min(len(tiles), os.cpu_count() or 1)) as executor:
+        tile_results = list(executor.map(lambda t: decode(gray[t[0]:t[1], t[2]:t[3]]), tiles))
+    
+    # 合并结果，重叠区域内被两个分块同时识别到的QR码只保留一个
+    decoded_objects = []
+    seen = {}
+    for (y0, _, x0, _), objs in zip(tiles, tile_results):
+        for obj in objs:
+            obj = _translate_decoded(obj, x0, y0)
+            cx, cy = _polygon_centre(obj)
+            centres = seen.setdefault(obj.data, [])
+            if any(abs(cx - px) < code_size / 2 and abs(cy - py) < code_size / 2 for px, py in centres):
+                continue
+            centres.append((cx, cy))
+            decoded_objects.append(obj)
+    
+    if len(decoded_objects) < probe_count:
+        # 分块反而漏识别时（例如分块切开了QR码），退回整图解码
+        print("分块解码结果少于预扫描结果，改为整图解码")
+        return decode(gray)
+    return decoded_objects
+
+def _index_gaps(decoded_objects):
+    """返回带 IDX:NNN: 前缀的数据块中缺失的内部索引及已知的最大索引
+
+    无法判断（没有识别结果或数据不带索引前缀）时返回 (None, None)。
+    末尾缺失的数据块无法从索引中发现，不计入缺失。
+    """
+    indices = set()
+    for obj in decoded_objects:
+        data = obj.data
+        if not (data.startswith(b'IDX:') and data[4:7].isdigit()):
+            return None, None
+        indices.add(int(data[4:7]))
+    if not indices:
+        return None, None
+    last = max(indices)
+    return set(range(last + 1)) - indices, last
+
+def decode_with_opencv(gray):
+    """使用OpenCV的QRCodeDetector一次性检测并解码图像中的多个QR码，只返回成功解码的QR码
+
+    耗时随QR码数量快速增长且常有遗漏，仅用于补充pyzbar未识别的少量QR码。
+    """
+    try:
+        ok, decoded_info, points, _ = cv2.QRCodeDetector().detectAndDecodeMulti(gray)
+    except cv2.error as e:
+        print(f"OpenCV QR码解码失败: {str(e)}")
+        return []
+    if not ok or points is None:
+        return []
+    
+    decoded_objects = []
+    for data, quad in zip(decoded_info, points.astype(np.int32)):
+        if not data:
+            continue
+        polygon = [CvPoint(int(x), int(y)) for x, y in quad]
+        left, top = quad.min(axis=0)
+        right, bottom = quad.max(axis=0)
+        rect = CvRect(int(left), int(top), int(right - left), int(bottom - top))
+        decoded_objects.append(CvDecoded(data.encode('utf-8'), 'QRCODE', rect, polygon))
+    return decoded_objects
+
+def _fill_gaps_with_opencv(gray, decoded_objects):
+    """pyzbar的结果中间缺少数据块且QR码总数较少时，用OpenCV补充识别，只合并新的数据"""
+    missing, last = _index_gaps(decoded_objects)
+    if not missing or last + 1 > OPENCV_FALLBACK_MAX_CODES:
+        return decoded_objects
+    print(f"pyzbar未识别到 {len(missing)} 个数据块，尝试使用OpenCV补充识别")
+    known = {obj.data for obj in decoded_objects}
+    extra = [obj for obj in decode_with_opencv(gray) if obj.data not in known]
+    if extra:
+        print(f"OpenCV补充识别到 {len(extra)} 个QR码")
+        decoded_objects = list(decoded_objects) + extra
+    return decoded_objects
+
+def _decode_payloads_joined(decoded_objects):
+    """将所有QR码数据用分隔符拼接后一次解码为UTF-8文本，按原顺序拆分返回
+
+    任一数据不是合法UTF-8、或数据本身含有分隔符（拆分数量不符）时返回None。
+    """
+    try:
+        texts = PAYLOAD_SEPARATOR.join(obj.data for obj in decoded_objects).decode('utf-8').split(PAYLOAD_SEPARATOR.decode())
+    except UnicodeDecodeError:
+        return None
+    return texts if len(texts) == len(decoded_objects) else None
+
+def debug_image_path(image_path):
+    """可视化调试结果图像的保存路径：原文件名加 _debug.png 后缀，内存中的图像保存到临时目录"""
+    if image_path is None or isinstance(image_path, np.ndarray):
+        return os.path.join(tempfile.gettempdir(), "pasted_image_debug.png")
+    base_path, _ = os.path.splitext(image_path)
+    return f"{base_path}_debug.png"
+
+def show_debug_image(image_path):
+    """在OpenCV窗口中显示已保存的调试图像，按任意键关闭（仅供命令行使用，会阻塞直到窗口关闭）"""
+    saved_path = debug_image_path(image_path)
+    image = cv2.imread(saved_path)
+    if image is None:
+        return
+    # 使用英文标题以避免中文编码问题
+    cv2.imshow("QR Code Array Detection Result", image)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
 
 def read_qr_code(image_path, visual_debug=False):
     """读取单个QR码图像"""
@@ -33,10 +277,10 @@ def read_qr_code(image_path, visual_debug=False):
             # 打印识别的数据和类型
             print(f"类型: {obj.type}, 数据: {obj.data.decode('utf-8')}")
         
-        # 显示图像
-        cv2.imshow("QR Code Viewer", image)
-        cv2.waitKey(0)
-        cv2.destroyAllWindows()
+        # 保存标记结果，由调用方决定如何显示
+        saved_path = debug_image_path(image_path)
+        cv2.imwrite(saved_path, image)
+        print(f"已保存调试图像到: {saved_path}")
     
     results = []
     for obj in decoded_objects:
@@ -45,25 +289,63 @@ def read_qr_code(image_path, visual_debug=False):
     return results
 
 def extract_qr_codes_from_array(array_image_path, visual_debug=False):
-    """从QR码阵列图像中提取所有QR码"""
+    """从QR码阵列图像中提取所有QR码
+
+    array_image_path 可以是图像文件路径，也可以是内存中的图像数组
+    （BGR彩色或灰度的NumPy数组，例如从剪贴板粘贴的图像）。
+    """
+    # 同一图像已识别过时直接返回缓存结果；可视化调试需要重新标记QR码位置，因此不使用缓存
+    cached = None
+    if isinstance(array_image_path, np.ndarray):
+        # 内存中的图像，无需读取文件，按图像内容计算缓存键
+        image = array_image_path
+        array_image_path = None
+        cache_key = _image_cache_key(image)
+        if not visual_debug:
+            cached = _get_cached_results(cache_key)
     # 检查文件是否存在
-    if not os.path.exists(array_image_path):
+    elif not os.path.exists(array_image_path):
         print(f"错误: 图像文件 '{array_image_path}' 不存在")
         return []
-        
-    # 尝试使用OpenCV读取图像
-    image = cv2.imread(array_image_path)
+    else:
+        # 本地文件以路径、大小和纳秒级修改时间作为缓存键，命中时无需读取文件。
+        # 不再比较文件开头的字节：QR码阵列PNG的开头只有固定的文件签名和尺寸信息，无法区分内容
+        image = None
+        st = os.stat(array_image_path)
+        cache_key = (os.path.abspath(array_image_path), st.st_size, st.st_mtime_ns)
+        if not visual_debug:
+            cached = _get_cached_results(cache_key)
+        if cached is None:
+            with open(array_image_path, 'rb') as f:
+                raw = f.read()
+    
+    if cached is not None:
+        print(f"图像内容未变化，使用缓存的识别结果（{len(cached)} 个QR码）")
+        return cached
+    
+    if array_image_path is not None:
+        # 尝试使用OpenCV解码图像（空文件交给下面的PIL处理并报错）
+        # QR码阵列是黑白图像，只有可视化调试需要彩色原图，其余情况直接解码为灰度，省去颜色转换
+        if raw:
+            flags = cv2.IMREAD_COLOR if visual_debug else cv2.IMREAD_GRAYSCALE
+            image = cv2.imdecode(np.frombuffer(raw, np.uint8), flags)
+        del raw
     
     # 如果OpenCV读取失败，尝试使用PIL读取
     if image is None:
         try:
             # 使用PIL读取图像，然后转换为OpenCV格式
-            pil_image = Image.open(array_image_path)
-            # 转换为RGB模式（如果是RGBA，去除透明通道）
-            if pil_image.mode == 'RGBA':
-                pil_image = pil_image.convert('RGB')
-            # 转换为NumPy数组
-            image = np.array(pil_image)
+            # 使用with确保解码完成后立即释放文件句柄
+            with Image.open(array_image_path) as pil_image:
+                # 转换为RGB模式（去除RGBA透明通道，并展开1位/调色板等模式），
+                # 非调试模式直接转换为灰度
+                if not visual_debug:
+                    if pil_image.mode != 'L':
+                        pil_image = pil_image.convert('L')
+                elif pil_image.mode not in ('RGB', 'L'):
+                    pil_image = pil_image.convert('RGB')
+                # 转换为NumPy数组
+                image = np.array(pil_image)
             # 如果图像是RGB格式，转换为BGR（OpenCV使用BGR）
             if len(image.shape) == 3 and image.shape[2] == 3:
                 image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
@@ -89,7 +371,7 @@ def extract_qr_codes_from_array(array_image_path, visual_debug=False):
     
     # 将图像转为灰度
     try:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     except Exception as e:
         print(f"错误: 图像转换为灰度失败: {str(e)}")
         # 尝试直接使用当前图像
@@ -97,7 +379,7 @@ def extract_qr_codes_from_array(array_image_path, visual_debug=False):
     
     # 解码QR码
     try:
-        decoded_objects = decode(gray)
+        decoded_objects = decode_tiled(gray)
     except Exception as e:
         print(f"错误: QR码解码失败: {str(e)}")
         # 尝试使用原图像直接解码
@@ -106,35 +388,57 @@ def extract_qr_codes_from_array(array_image_path, visual_debug=False):
         except Exception as e2:
             print(f"错误: 原图像QR码解码也失败: {str(e2)}")
             return []
+    # 中间有数据块未识别时，用OpenCV补充（QR码较多时耗时过长，不使用）
+    decoded_objects = _fill_gaps_with_opencv(gray, decoded_objects)
+    
+    # 解析结果：每个QR码的数据只解码一次，可视化标注与结果共用（非UTF-8数据记为None）
+    # 先用分隔符拼接后整体解码一次；有非UTF-8数据或数据本身含分隔符时再逐个解码
+    texts = _decode_payloads_joined(decoded_objects)
+    if texts is None:
+        texts = []
+        for obj in decoded_objects:
+            try:
+                texts.append(obj.data.decode('utf-8'))
+            except UnicodeDecodeError:
+                print("QR码数据解码失败：非UTF-8编码")
+                texts.append(None)
+    results = [data for data in texts if data is not None]
+    if logger.isEnabledFor(logging.DEBUG):
+        for data in results:
+            logger.debug("识别到QR码数据: %s", f"{data[:40]}..." if len(data) > 40 else data)
     
     if visual_debug:
-        # 创建一个可视化图像副本
-        visual_image = image.copy()
+        # 创建一个可视化图像副本（灰度图像转为彩色以便标记）
+        visual_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image.copy()
         
         # 在图像上标记识别到的QR码
-        for i, obj in enumerate(decoded_objects):
+        # 顶点坐标写入预先分配的缓冲区，不为每个QR码创建新的数组（顶点较多时才扩容）
+        pts_buffer = np.empty((8, 2), dtype=np.int32)
+        for i, (obj, data) in enumerate(zip(decoded_objects, texts)):
             points = obj.polygon
+            if len(points) > len(pts_buffer):
+                pts_buffer = np.empty((len(points), 2), dtype=np.int32)
+            pts = pts_buffer[:len(points)]
+            for k, point in enumerate(points):
+                pts[k] = (point.x, point.y)
             if len(points) > 4:
-                hull = cv2.convexHull(np.array([point for point in points]))
+                hull = cv2.convexHull(pts)
                 cv2.polylines(visual_image, [hull], True, (0, 255, 0), 3)
             else:
-                cv2.polylines(visual_image, [np.array(points)], True, (0, 255, 0), 3)
+                cv2.polylines(visual_image, [pts.reshape(-1, 1, 2)], True, (0, 255, 0), 3)
             
             # 显示QR码索引（尝试从数据中提取）
             try:
-                data = obj.data.decode('utf-8')
                 # 尝试找出索引
-                index_match = re.search(r'IDX:(\d{3}):', data)
+                index_match = _IDX_LABEL_PATTERN.search(data) if data is not None else None
                 if index_match:
                     index_num = index_match.group(1)
                 else:
                     index_num = str(i)
                 
                 # 在QR码上方显示索引号，更加明显
-                pts = np.array(points, np.int32)
-                pts = pts.reshape((-1, 1, 2))
-                text_x = pts[0][0][0]
-                text_y = pts[0][0][1] - 10  # 在QR码上方显示
+                text_x = int(pts[0][0])
+                text_y = int(pts[0][1]) - 10  # 在QR码上方显示
                 
                 # 绘制索引号（带背景色以提高可见性）
                 cv2.rectangle(visual_image, 
@@ -147,73 +451,103 @@ def extract_qr_codes_from_array(array_image_path, visual_debug=False):
             except Exception as e:
                 print(f"在可视化过程中发生错误: {str(e)}")
         
-        # 保存可视化结果到文件
-        # 根据原文件扩展名确定调试图像的保存路径
-        base_path, ext = os.path.splitext(array_image_path)
-        debug_image_path = f"{base_path}_debug.png"
-        
-        cv2.imwrite(debug_image_path, visual_image)
-        print(f"已保存调试图像到: {debug_image_path}")
-        
-        # 显示图像 - 使用英文标题以避免中文编码问题
-        cv2.imshow("QR Code Array Detection Result", visual_image)
-        cv2.waitKey(0)
-        cv2.destroyAllWindows()
-    
-    # 解析结果
-    results = []
-    for obj in decoded_objects:
-        try:
-            data = obj.data.decode('utf-8')
-            print(f"识别到QR码数据: {data[:40]}..." if len(data) > 40 else f"识别到QR码数据: {data}")
-            results.append(data)
-        except UnicodeDecodeError:
-            print("QR码数据解码失败：非UTF-8编码")
-            continue
+        # 保存可视化结果到文件，不在库函数中弹出窗口阻塞调用线程，
+        # 由调用方（命令行或图形界面）加载显示
+        saved_path = debug_image_path(array_image_path)
+        cv2.imwrite(saved_path, visual_image)
+        print(f"已保存调试图像到: {saved_path}")
     
+    _store_cached_results(cache_key, results)
     return results
 
+def _combine_indexed_fast(qr_data_list):
+    """快速路径：所有数据块都是 IDX:NNN: 格式且索引恰好为 0..N-1 时，按索引直接放入列表并拼接
+
+    不满足条件（没有数据、格式混杂、索引缺失或重复）时返回None，由通用解析流程处理。
+    """
+    if not qr_data_list:
+        return None
+    first = qr_data_list[0]
+    if not (first.startswith('IDX:') and first[7:8] == ':'):
+        return None
+    
+    ordered = [None] * len(qr_data_list)
+    try:
+        for data in qr_data_list:
+            if data[7:8] != ':' or not data.startswith('IDX:') or not data[4:7].isdecimal():
+                return None
+            index = int(data[4:7])
+            if ordered[index] is not None:
+                return None
+            ordered[index] = data[8:]
+    except IndexError:
+        return None
+    # 每个位置恰好写入一次，无需再检查空位
+    return ''.join(ordered)
+
 def combine_qr_code_data(qr_data_list):
     """从QR码数据中提取索引并按顺序重组文本"""
+    # 现行编码器生成的数据走快速路径，跳过逐个格式匹配和索引排序
+    combined_text = _combine_indexed_fast(qr_data_list)
+    if combined_text is not None:
+        print(f"数据块索引连续: 0-{len(qr_data_list) - 1}")
+        return combined_text
+    
     # 创建一个字典，用于存储索引和对应的文本
     indexed_data = {}
+    verbose = logger.isEnabledFor(logging.DEBUG)
+    # 无法解析的数据块个数，以及它们是否都带有IDX:前缀（供下面的手动恢复判断，无需再遍历一遍）
+    unparsed = 0
+    unparsed_all_idx = True
     
     # 解析每个QR码数据，支持新旧两种索引格式
     for data in qr_data_list:
         # 调试输出，帮助诊断问题
-        print(f"正在解析数据，前10个字符: [{data[:10]}]")
+        if verbose:
+            logger.debug("正在解析数据，前10个字符: [%s]", data[:10])
         
-        # 尝试新格式 "IDX:000:"
-        # 使用search而不是match，并且优化正则表达式，使其更加宽松
-        match = re.search(r'IDX:(\d{3}):(.*)', data, re.DOTALL)
+        # 尝试新格式 "IDX:000:"，前缀总在开头，直接按固定位置切片
+        if data.startswith('IDX:') and data[7:8] == ':' and data[4:7].isdecimal():
+            index = int(data[4:7])
+            text = data[8:]
+            indexed_data[index] = text
+            if verbose:
+                logger.debug("匹配成功(新格式): 索引=%d, 文本长度=%d", index, len(text))
+            continue
+        
+        # 前缀不在开头时退回宽松的正则搜索
+        match = _IDX_SEARCH_PATTERN.search(data)
         if match:
             index = int(match.group(1))
             text = match.group(2)
             indexed_data[index] = text
-            print(f"匹配成功(新格式): 索引={index}, 文本长度={len(text)}")
+            if verbose:
+                logger.debug("匹配成功(新格式): 索引=%d, 文本长度=%d", index, len(text))
             continue
             
         # 尝试旧格式 "0:"
-        match = re.search(r'^(\d+):(.*)', data, re.DOTALL)
-        if match:
-            index = int(match.group(1))
-            text = match.group(2)
+        head, sep, text = data.partition(':')
+        if sep and head.isdecimal():
+            index = int(head)
             indexed_data[index] = text
-            print(f"匹配成功(旧格式): 索引={index}, 文本长度={len(text)}")
+            if verbose:
+                logger.debug("匹配成功(旧格式): 索引=%d, 文本长度=%d", index, len(text))
             continue
         
+        unparsed += 1
+        unparsed_all_idx = unparsed_all_idx and data.startswith('IDX:')
         print(f"无法解析索引: {data[:40]}..." if len(data) > 40 else f"无法解析索引: {data}")
         # 如果只有一个QR码且没有索引，直接返回内容
         if len(qr_data_list) == 1:
             print("只有一个QR码且无索引，直接返回内容")
             return data
     
-    if not indexed_data:
+    if unparsed == len(qr_data_list):
         print("没有有效的索引数据")
         
         # 紧急修复：如果所有数据都以IDX:开头但无法正常解析，进行手动解析
         manual_recovery = False
-        if all(data.startswith('IDX:') for data in qr_data_list):
+        if unparsed_all_idx:
             print("检测到所有数据块都包含IDX:前缀，尝试手动恢复...")
             try:
                 for data in qr_data_list:
@@ -239,18 +573,27 @@ def combine_qr_code_data(qr_data_list):
     # 按索引排序并合并文本
     sorted_indices = sorted(indexed_data.keys())
     print(f"有效索引列表: {sorted_indices}")
+    # 索引应从0开始连续，缺失时提示（通常是有QR码未被识别）
+    missing = sorted_indices[-1] + 1 - len(sorted_indices)
+    if sorted_indices[0] != 0:
+        print(f"警告: 缺少第一个数据块（索引0），识别到的最小索引为 {sorted_indices[0]}")
+    if missing:
+        print(f"警告: 索引不连续，缺少 {missing} 个数据块")
     combined_text = ''.join(indexed_data[index] for index in sorted_indices)
     
     return combined_text
 
 def read_qr_array(array_image_path, visual_debug=False):
-    """主函数：读取QR码阵列并重组文本"""
-    print(f"正在读取图像: {array_image_path}")
-    
-    # 检查文件类型
-    _, ext = os.path.splitext(array_image_path)
-    if ext.lower() not in ['.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tiff', '.tif']:
-        print(f"警告: 文件类型 {ext} 可能不被支持，将尝试读取")
+    """主函数：读取QR码阵列并重组文本（图像可以是文件路径或内存中的图像数组）"""
+    if isinstance(array_image_path, np.ndarray):
+        print(f"正在读取内存中的图像: {array_image_path.shape[1]}x{array_image_path.shape[0]}")
+    else:
+        print(f"正在读取图像: {array_image_path}")
+        
+        # 检查文件类型
+        _, ext = os.path.splitext(array_image_path)
+        if ext.lower() not in ['.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tiff', '.tif']:
+            print(f"警告: 文件类型 {ext} 可能不被支持，将尝试读取")
     
     # 从阵列图像中提取所有QR码数据
     qr_data_list = extract_qr_codes_from_array(array_image_path, visual_debug)
@@ -273,8 +616,10 @@ def read_qr_array(array_image_path, visual_debug=False):
 
 if __name__ == "__main__":
     # 测试
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
     array_image_path = "qr_array.png"
     combined_text = read_qr_array(array_image_path, visual_debug=True)
+    show_debug_image(array_image_path)
     
     if combined_text:
         print("\n重组后的完整文本:")